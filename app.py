@@ -52,33 +52,36 @@ INDIAN_STATES = [
 
 @st.cache_data(show_spinner=False)
 def load_state_districts():
-    """Build state→[districts] mapping from the pincode CSV."""
-    import os
-    csv_path = os.path.join(os.path.dirname(__file__), "datasets", "india pincode final.csv")
+    """Build state→[districts] mapping from the pincode index."""
     try:
-        df = pd.read_csv(csv_path, usecols=["Districtname", "statename"], dtype=str)
-        df = df.dropna(subset=["Districtname", "statename"])
-        # CSV state names are ALL CAPS — title-case them for matching
-        df["state_tc"] = df["statename"].str.strip().str.title()
+        import data_store
         # Special corrections (title-case mangles some names)
         corrections = {
             "Jammu & Kashmir": "Jammu & Kashmir",
             "Andaman & Nicobar Islands": "Andaman & Nicobar Islands",
             "Dadra & Nagar Haveli And Daman & Diu": "Dadra & Nagar Haveli and Daman & Diu",
         }
-        for wrong, right in corrections.items():
-            df.loc[df["state_tc"] == wrong, "state_tc"] = right
-        mapping = (
-            df.groupby("state_tc")["Districtname"]
-            .apply(lambda s: sorted(s.str.strip().unique().tolist()))
-            .to_dict()
-        )
-        return mapping
+        mapping = {}
+        for state, districts in data_store.pincode_index().state_districts().items():
+            # CSV state names are ALL CAPS — title-case them for matching
+            state_tc = state.title()
+            state_tc = corrections.get(state_tc, state_tc)
+            mapping[state_tc] = sorted(set(mapping.get(state_tc, [])) | set(districts))
+        return dict(sorted(mapping.items()))
     except Exception:
         return {}
 
 STATE_DISTRICTS = load_state_districts()
 
+
+@st.cache_resource(show_spinner=False)
+def start_model_warmup():
+    """Start loading model artifacts in the background, once per server."""
+    from predict import warmup
+    return warmup(background=True)
+
+start_model_warmup()
+
 # — keep a fallback so the app never breaks even if CSV is missing —
 _FALLBACK_DISTRICTS = {
     "Andhra Pradesh": ["Anantapur","Chittoor","East Godavari","Guntur","Krishna","Kurnool","Nellore","Prakasam","Srikakulam","Visakhapatnam","Vizianagaram","West Godavari","YSR Kadapa"],
@@ -127,78 +130,8 @@ DUMMY_MARKETS = [
 # =============================================================================
 # DISTRICT NORMALISATION + STATE CROPS  — identical to sms_handler.py
 # =============================================================================
-DISTRICT_ALIASES = {
-    "ananthapur": "Anantapur", "karim nagar": "Karimnagar",
-    "k.v.rangareddy": "Rangareddi", "visakhapatnam": "Vishakhapatnam",
-    "dhubri": "Dhuburi", "mammit": "Mamit",
-    "east champaran": "Purba Champaran", "west champaran": "Pashchim Champaran",
-    "kaimur (bhabua)": "Bhabua", "palamau": "Palamu", "arwal": "Jehanabad",
-    "bijapur(cgh)": "Bijapur",
-    "central delhi": "Delhi", "east delhi": "Delhi", "new delhi": "Delhi",
-    "north delhi": "Delhi", "north west delhi": "Delhi", "south delhi": "Delhi",
-    "south west delhi": "Delhi", "west delhi": "Delhi",
-    "ahmedabad": "Ahmadabad", "ahmed nagar": "Ahmednagar",
-    "banaskantha": "Banas Kantha", "gandhi nagar": "Gandhinagar",
-    "sabarkantha": "Sabar Kantha", "surendra nagar": "Surendranagar",
-    "bilaspur (hp)": "Bilaspur", "hamirpur(hp)": "Hamirpur",
-    "lahul & spiti": "Lahul And Spiti",
-    "ananthnag": "Anantnag (Kashmir South)", "baramulla": "Baramula (Kashmir North)",
-    "poonch": "Punch", "reasi": "Rajauri",
-    "giridh": "Giridih", "khunti": "Ranchi", "ramgarh": "Ranchi",
-    "seraikela-kharsawan": "Saraikela Kharsawan",
-    "east singhbhum": "Purba Singhbhum", "west singhbhum": "Pashchim Singhbhum",
-    "bangalore": "Bangalore Urban", "chickmagalur": "Chikmagalur",
-    "chikkaballapur": "Chikmagalur", "dakshina kannada": "Dakshin Kannad",
-    "davangere": "Davanagere", "ramanagar": "Bangalore Rural",
-    "krishnagiri": "Dharmapuri", "uttara kannada": "Uttar Kannand",
-    "yadgir": "Gulbarga", "bijapur(kar)": "Bijapur",
-    "kasargod": "Kasaragod", "pathanamthitta": "Pattanamtitta",
-    "alirajpur": "Jhabua", "ashok nagar": "Ashoknagar", "budaun": "Badaun",
-    "khargone": "East Nimar", "rajnandgaon": "Raj Nandgaon", "singrauli": "Sidhi",
-    "aurangabad(bh)": "Aurangabad", "beed": "Bid", "buldhana": "Buldana",
-    "gadchiroli": "Garhchiroli", "gondia": "Gondiya",
-    "mumbai": "Greater Bombay", "raigarh(mh)": "Raigarh",
-    "imphal east": "East Imphal", "imphal west": "West Imphal",
-    "ri bhoi": "Ri-Bhoi",
-    "kiphire": "Tuensang", "longleng": "Mokokchung", "peren": "Kohima",
-    "balangir": "Bolangir", "baleswar": "Baleshwar", "bargarh": "Baragarh",
-    "debagarh": "Deogarh", "jagatsinghapur": "Jagatsinghpur",
-    "jajapur": "Jajpur", "kendujhar": "Keonjhar", "khorda": "Khordha",
-    "nabarangapur": "Nabarangpur", "sonapur": "Sonepur", "sundergarh": "Sundargarh",
-    "pondicherry": "Puducherry",
-    "nawanshahr": "Nawan Shehar", "ropar": "Rupnagar",
-    "chittorgarh": "Chittaurgarh", "dholpur": "Dhaulpur", "jhujhunu": "Jhunjhunun",
-    "tiruchirappalli": "Tiruchchirappalli", "tiruchirapalli": "Tiruchchirappalli",
-    "tiruchi": "Tiruchchirappalli", "trichy": "Tiruchchirappalli",
-    "tirunelveli": "Tirunelveli Kattabo", "tiruvallur": "Thiruvallur",
-    "tiruvarur": "Thiruvarur", "kancheepuram": "Kancheepuram",
-    "kanchipuram": "Kancheepuram", "the nilgiris": "Nilgiris",
-    "tuticorin": "Thoothukudi", "kanyakumari": "Kanniyakumari",
-    "chengalpattu": "Kancheepuram", "ranipet": "Vellore", "tiruppur": "Tirupur",
-    "barabanki": "Bara Banki", "bagpat": "Baghpat", "raebareli": "Rae Bareli",
-    "sant ravidas nagar": "Sant Ravi Das Nagar", "siddharthnagar": "Siddharth Nagar",
-    "shrawasti": "Shravasti", "kanpur nagar": "Kanpur", "kheri": "Lakhimpur Kheri",
-    "dehradun": "Dehra Dun", "nainital": "Naini Tal", "rudraprayag": "Rudra Prayag",
-    "bardhaman": "Barddhaman", "howrah": "Haora", "malda": "Maldah",
-    "north dinajpur": "Uttar Dinajpur", "south dinajpur": "Dakshin Dinajpur",
-    "sonipat": "Sonepat",
-    "dadra & nagar haveli": "Dadra And Nagar Haveli",
-    "lakshadweep": "Kavaratti", "east sikkim": "East",
-    "dibang valley": "Upper Dibang Valley", "bilaspur(cgh)": "Bilaspur",
-}
-
-
-def normalize_district(raw: str) -> str:
-    """
-    Corrects known spelling mismatches for centroid lookup.
-    Returns the corrected district name, or raw.title() if no alias.
-    Never returns None — all districts are accepted.
-    Identical logic to sms_handler.py.
-    """
-    key = raw.strip().lower()
-    if key in DISTRICT_ALIASES:
-        return DISTRICT_ALIASES[key]
-    return raw.strip().title()
+# District spellings resolve to district ids in districts.py (one alias table
+# for every dataset); lookup_pincode() returns the pincode's district id.
 
 
 # Per-state crop availability (same as sms_handler.py)
@@ -898,8 +831,11 @@ def render_results(inputs):
     state        = loc["state"]      # e.g. 'Tamil Nadu'
 
     # ── Normalise district name (same as sms_handler.py) ──────────
-    #   Fixes CSV spelling mismatches before passing to recommend()
-    district = normalize_district(raw_district)
+    #   Centroid-CSV name of the pincode's district id, so recommend()
+    #   resolves it to the same district
+    import data_store
+    district = (data_store.district_ids().name(loc["district_id"])
+                or raw_district.strip().title())
 
     # Show resolved location
     st.info(f"📍 **{district}, {state}** (pincode {pincode})")
@@ -0,0 +1,166 @@
+"""
+artifacts.py
+============
+Versioned model artifact registry.
+Used by train_model.py (publish) and predict.py (load / hot-swap).
+
+Layout:
+    model/
+      versions/<version_id>/
+        price_model.joblib  encoders.joblib  features.joblib
+        clean_df.parquet    serving_snapshot.parquet
+        clean_df.part-<version>.parquet  ← one per ingested batch
+        manifest.json       ← content hashes, training date, features
+                              (model files re-hashed on load, data
+                              files size-checked — verify())
+      current               ← text file holding the active version_id
+
+A model folder without a `current` pointer (the original flat
+layout, artifacts directly under model/) resolves to the
+'legacy' version.
+
+Usage:
+    from artifacts import resolve, read_manifest
+    version, model_dir = resolve()
+    print(version, read_manifest(model_dir))
+"""
+
+import datetime
+import hashlib
+import json
+import os
+
+MODEL_ROOT     = 'model'
+LEGACY_VERSION = 'legacy'
+MANIFEST       = 'manifest.json'
+
+
+def _pointer_path(root):
+    return os.path.join(root, 'current')
+
+
+def version_dir(version, root=MODEL_ROOT):
+    """Directory holding one version's artifacts."""
+    if version == LEGACY_VERSION:
+        return root
+    return os.path.join(root, 'versions', version)
+
+
+def current_version(root=MODEL_ROOT):
+    """Version id the `current` pointer names, or 'legacy' if none."""
+    try:
+        with open(_pointer_path(root), encoding='utf-8') as f:
+            return f.read().strip() or LEGACY_VERSION
+    except FileNotFoundError:
+        return LEGACY_VERSION
+
+
+def resolve(version=None, root=MODEL_ROOT):
+    """(version_id, directory) — the current version if none given."""
+    version = version or current_version(root)
+    return version, version_dir(version, root)
+
+
+def new_version(root=MODEL_ROOT):
+    """
+    Create and return (version_id, directory) for a new version.
+    Ids are timestamps to the second; if another run already took
+    this second, the next free second is used, so ids (and the
+    history parts named after them) still sort in creation order.
+    """
+    stamp = datetime.datetime.now().replace(microsecond=0)
+    while True:
+        version = stamp.strftime('%Y%m%d-%H%M%S')
+        path = version_dir(version, root)
+        try:
+            os.makedirs(path, exist_ok=False)
+            return version, path
+        except FileExistsError:
+            stamp += datetime.timedelta(seconds=1)
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _file_entry(path, known):
+    """Manifest entry of a file — reused from `known` if sizes match."""
+    size = os.path.getsize(path)
+    if known is not None and known.get('bytes') == size:
+        return dict(known)
+    return {'sha256': file_sha256(path), 'bytes': size}
+
+
+def write_manifest(path, version, features, known=None, **extra):
+    """
+    Hash every artifact in path and write manifest.json.
+    known maps file names to entries already hashed — files
+    hard-linked from a parent version (its manifest's 'files')
+    are not read again. extra (e.g. metrics=...) is stored as-is.
+    """
+    known = known or {}
+    files = {
+        name: _file_entry(os.path.join(path, name), known.get(name))
+        for name in sorted(os.listdir(path)) if name != MANIFEST
+    }
+    manifest = {
+        'version':    version,
+        'trained_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'features':   list(features),
+        'files':      files,
+        **extra,
+    }
+    with open(os.path.join(path, MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def read_manifest(path):
+    """Parsed manifest.json of a version directory, or None (legacy)."""
+    try:
+        with open(os.path.join(path, MANIFEST), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+# Checked by content on every load — the model itself; the data
+# files (parquet) are hashed when published and only size-checked
+# when loaded, so a load doesn't read the whole price history
+HASHED_AT_LOAD = ('.joblib', '.npz')
+
+
+def verify(path, full=False):
+    """
+    Check the files listed in the manifest: every file's size,
+    and the hash of the model files (HASHED_AT_LOAD) — of every
+    file with full=True. Raises ValueError on a missing or
+    modified file; a folder without a manifest (legacy) is
+    accepted as-is.
+    """
+    manifest = read_manifest(path)
+    if manifest is None:
+        return
+    for name, meta in manifest['files'].items():
+        file_path = os.path.join(path, name)
+        if not os.path.exists(file_path):
+            raise ValueError(f"{file_path} listed in manifest is missing")
+        if os.path.getsize(file_path) != meta['bytes']:
+            raise ValueError(f"{file_path} does not match its manifest size")
+        if ((full or name.endswith(HASHED_AT_LOAD)) and
+                file_sha256(file_path) != meta['sha256']):
+            raise ValueError(f"{file_path} does not match its manifest hash")
+
+
+def set_current(version, root=MODEL_ROOT):
+    """Atomically point `current` at version."""
+    if not os.path.isdir(version_dir(version, root)):
+        raise ValueError(f"Unknown model version: {version}")
+    tmp = _pointer_path(root) + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(version + '\n')
+    os.replace(tmp, _pointer_path(root))
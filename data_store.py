@@ -0,0 +1,449 @@
+"""
+data_store.py
+=============
+Single in-process owner of the shared datasets.
+Used by predict.py, recommender.py, sms/sms_handler.py and app.py.
+
+Each dataset is loaded once per process, on first use, and handed
+out as a read-only view:
+  - price_history()  compact price history (clean_df.parquet + ingested
+                     parts) of the active model version
+  - lag_tables()     serving lag / rolling feature arrays of that version
+  - markets()        distinct (market, district, state) per commodity
+  - centroids()      district wise centroids.csv
+  - final_data()     final_data.csv (mandi master list)
+  - pincodes()       india pincode final.csv
+  - pincode_index()  pincode → (district, state) / district id, as .npz
+  - district_index() centroid row per district / (district, state)
+  - district_ids()   any district spelling → district id (districts.py)
+  - district_crosswalk() every spelling's id, per model version
+  - distance_matrix() district-to-district road km, persisted as .npy
+
+Views are shallow copies: with pandas copy-on-write writes to a view
+never reach the shared frame. It is the only mode from pandas 3; on
+pandas 2 importing this module switches it on, so the whole process
+behaves as it does on pandas 3. NumPy arrays are returned with
+writeable=False.
+
+Across processes: when FASAL_SHARED_DIR is set (gunicorn.conf.py sets
+it), the price history and lag tables are published once per model
+version as .npy files in that directory and every worker memory-maps
+them read-only — N gunicorn workers hold one copy of the data. Each
+publish prunes the copies of older versions.
+
+Usage:
+    import data_store
+    hist = data_store.price_history('model')
+    data_store.memory_report()
+"""
+
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+
+import geo
+import districts
+from pincode_index import PincodeIndex
+from history import (HISTORY_FEATURES, NAME_COLUMNS, SERVING_COLUMNS,
+                     build_snapshot, history_files, load_markets,
+                     load_price_history, to_day_number)
+
+_ROOT = os.path.dirname(os.path.abspath(__file__))
+CENTROIDS_CSV  = os.path.join(_ROOT, 'datasets', 'district wise centroids.csv')
+FINAL_DATA_CSV = os.path.join(_ROOT, 'datasets', 'final_data.csv')
+PINCODE_CSV    = os.path.join(_ROOT, 'datasets', 'india pincode final.csv')
+DISTANCE_NPY   = os.path.join(_ROOT, 'datasets', 'district_distances.npy')
+PINCODE_NPZ    = os.path.join(_ROOT, 'datasets', 'pincode_index.npz')
+
+SHARED_DIR = os.environ.get('FASAL_SHARED_DIR') or None
+
+# _view's shallow copies are only read-only under copy-on-write
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+_store = {}                 # name → loaded dataset
+_lock  = threading.RLock()      # loaders may use other datasets
+
+
+def _once(name, loader):
+    """Load a dataset the first time it is asked for."""
+    value = _store.get(name)
+    if value is None:
+        with _lock:
+            value = _store.get(name)
+            if value is None:
+                value = loader()
+                _store[name] = value
+    return value
+
+
+def _keyed(name, key, loader):
+    """
+    Like _once, for datasets that belong to one model version:
+    only the entry for the latest key is kept, so a hot-swap
+    releases the previous version's copy.
+    """
+    current = _store.get(name)
+    if current is None or current[0] != key:
+        with _lock:
+            current = _store.get(name)
+            if current is None or current[0] != key:
+                current = (key, loader())
+                _store[name] = current
+    return current[1]
+
+
+def _view(value):
+    """Read-only view of a stored dataset."""
+    if isinstance(value, np.ndarray):
+        view = value.view()
+        view.flags.writeable = False
+        return view
+    return value.copy(deep=False)
+
+
+# ── Cross-process sharing ────────────────────────────────
+def _publish(path, arrays, meta):
+    """Write arrays + meta under path atomically (first writer wins)."""
+    tmp = f"{path}.tmp{os.getpid()}"
+    os.makedirs(tmp, exist_ok=True)
+    for name, arr in arrays.items():
+        np.save(os.path.join(tmp, f"{name}.npy"), np.ascontiguousarray(arr))
+    with open(os.path.join(tmp, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump({'arrays': list(arrays), 'meta': meta}, f)
+    try:
+        os.rename(tmp, path)
+    except OSError:           # another process published it first
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _prune(name, stamp):
+    """
+    Drop `name` from the stamps of older sources — each hot-swap
+    would otherwise leave a full copy behind in SHARED_DIR (tmpfs).
+    Processes still mapping those files keep their pages until
+    they unmap; only new attaches need the current stamp.
+    """
+    mtime = int(stamp.rsplit('-', 1)[1])
+    for other in os.listdir(SHARED_DIR):
+        old = os.path.join(SHARED_DIR, other, name)
+        if other == stamp or not os.path.isdir(old):
+            continue
+        try:
+            if int(other.rsplit('-', 1)[1]) > mtime:
+                continue
+        except (IndexError, ValueError):
+            continue
+        shutil.rmtree(old, ignore_errors=True)
+        try:
+            os.rmdir(os.path.join(SHARED_DIR, other))
+        except OSError:       # other datasets still published there
+            pass
+
+
+def _attach(path):
+    """Memory-map a published set of arrays read-only."""
+    with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+        info = json.load(f)
+    arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')
+              for name in info['arrays']}
+    return arrays, info['meta']
+
+
+def shared_arrays(name, source, build):
+    """
+    (arrays, meta) for a dataset derived from the file `source`.
+    build() returns ({name: ndarray}, JSON-able meta). With
+    SHARED_DIR set, the first process to ask publishes the result
+    there and every process memory-maps it; otherwise build()
+    simply runs in-process. Publishing a new stamp removes the
+    same dataset of older sources (see _prune).
+    """
+    if not SHARED_DIR:
+        return build()
+    stamp = (os.path.basename(os.path.dirname(os.path.abspath(source)))
+             + f"-{int(os.path.getmtime(source))}")
+    path = os.path.join(SHARED_DIR, stamp, name)
+    if not os.path.isdir(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _publish(path, *build())
+        _prune(name, stamp)
+    return _attach(path)
+
+
+# ── Price history ────────────────────────────────────────
+def _history_arrays(model_dir):
+    """Compact history as plain arrays (categoricals → codes)."""
+    df = load_price_history(model_dir)
+    arrays = {col: (df[col].cat.codes.to_numpy() if col in NAME_COLUMNS
+                    else df[col].to_numpy())
+              for col in SERVING_COLUMNS}
+    meta = {'categories': {col: df[col].cat.categories.tolist()
+                           for col in NAME_COLUMNS}}
+    return arrays, meta
+
+
+def _history_frame(arrays, meta):
+    """Compact history frame over the arrays — no copy."""
+    cols = {}
+    for col in SERVING_COLUMNS:
+        if col in meta['categories']:
+            cols[col] = pd.Categorical.from_codes(
+                arrays[col], validate=False,
+                dtype=pd.CategoricalDtype(meta['categories'][col]))
+        else:
+            cols[col] = arrays[col]
+    return pd.DataFrame(cols, copy=False)
+
+
+def price_history(model_dir):
+    """
+    Compact price history of a model version directory.
+    Only the most recent directory is kept: asking for a new
+    one (after a model hot-swap) releases the previous copy.
+    """
+    # the newest file names the data: every ingest adds a part
+    source = history_files(model_dir)[-1]
+    return _view(_keyed('price_history', source, lambda: _history_frame(
+        *shared_arrays('price_history', source,
+                       lambda: _history_arrays(model_dir)))))
+
+
+# ── Serving lag tables ───────────────────────────────────
+def _lag_arrays(model_dir, snapshot_path):
+    # train_model.py writes serving_snapshot.parquet; older model
+    # folders only have the price history, so derive it here
+    if os.path.exists(snapshot_path):
+        snapshot = pd.read_parquet(snapshot_path)
+    else:
+        snapshot = build_snapshot(price_history(model_dir))
+    arrays = {
+        'lag_values': snapshot[HISTORY_FEATURES].to_numpy(dtype=np.float64),
+        'lag_rows':   snapshot['n_rows'].to_numpy(dtype=np.int32),
+        'lag_last':   to_day_number(snapshot['last_date'].to_numpy()),
+    }
+    keys = [list(k) for k in zip(snapshot['level'], snapshot['commodity'],
+                                 snapshot['key'])]
+    return arrays, {'keys': keys}
+
+
+def lag_tables(model_dir):
+    """
+    Lag / rolling features per (level, commodity, key) of a model
+    version: ({'lag_values': n×12 float64, 'lag_rows': int32,
+    'lag_last': int32 day numbers}, {'keys': [[level, commodity, key]]}).
+    """
+    snapshot_path = os.path.join(model_dir, 'serving_snapshot.parquet')
+    source = (snapshot_path if os.path.exists(snapshot_path)
+              else history_files(model_dir)[-1])
+    arrays, meta = _keyed('lag_tables', source, lambda: shared_arrays(
+        'lag_tables', source, lambda: _lag_arrays(model_dir, snapshot_path)))
+    return {k: _view(v) for k, v in arrays.items()}, meta
+
+
+_EMPTY_MARKETS = pd.DataFrame(columns=['market', 'district', 'state'],
+                              dtype=object)
+
+
+def _load_markets(model_dir):
+    return {c: g[['market', 'district', 'state']].reset_index(drop=True)
+            for c, g in load_markets(model_dir).groupby('commodity',
+                                                        sort=False)}
+
+
+def markets(model_dir, commodity=None):
+    """
+    Distinct (market, district, state) rows, optionally for one
+    commodity — from the version's markets.parquet, so the price
+    history is not loaded. Only the most recent directory is kept.
+    """
+    table = _keyed('markets', model_dir, lambda: _load_markets(model_dir))
+    if commodity is None:
+        return _view(pd.concat(table.values(), ignore_index=True)
+                       .drop_duplicates(ignore_index=True))
+    return _view(table.get(commodity, _EMPTY_MARKETS))
+
+
+# ── Reference CSVs ───────────────────────────────────────
+def _load_centroids():
+    df = pd.read_csv(CENTROIDS_CSV)
+    df.columns     = df.columns.str.strip()
+    df['District'] = df['District'].str.strip().str.title()
+    df['State']    = df['State'].str.strip()
+    return df
+
+
+def _load_final_data():
+    df = pd.read_csv(FINAL_DATA_CSV)
+    df['District'] = df['District'].str.strip().str.title()
+    df['State']    = df['State'].str.strip()
+    df['Market']   = df['Market'].str.strip()
+    return df
+
+
+def _load_pincodes():
+    df = pd.read_csv(PINCODE_CSV, dtype=str)
+    for col in df.columns:
+        df[col] = df[col].str.strip()
+    df['pincode'] = df['pincode'].str.zfill(6)
+    return df
+
+
+def centroids():
+    """District centroids — District title-cased, names stripped."""
+    return _view(_once('centroids', _load_centroids))
+
+
+def final_data():
+    """Mandi master list — District title-cased, names stripped."""
+    return _view(_once('final_data', _load_final_data))
+
+
+def pincodes():
+    """Pincode table as strings: pincode, Taluk, Districtname, statename."""
+    return _view(_once('pincodes', _load_pincodes))
+
+
+def _load_pincode_index():
+    """
+    The pincode index, built from the CSV once and saved next to
+    it; later loads read the .npz. Rebuilt if the CSV is newer.
+    """
+    try:
+        if os.path.getmtime(PINCODE_NPZ) >= os.path.getmtime(PINCODE_CSV):
+            return PincodeIndex.load(PINCODE_NPZ)
+    except (OSError, ValueError, KeyError):
+        pass
+
+    index = PincodeIndex.from_frame(_load_pincodes())
+    tmp = f"{PINCODE_NPZ}.tmp{os.getpid()}.npz"
+    try:
+        index.save(tmp)
+        os.replace(tmp, PINCODE_NPZ)
+    except OSError:           # read-only deploy — keep it in memory
+        pass
+    return index
+
+
+def pincode_index():
+    """
+    PincodeIndex — lookup(pincode) → (district, state) or None,
+    lookup_id(pincode) → district id or None.
+    """
+    return _once('pincode_index',
+                 lambda: _load_pincode_index().with_ids(district_ids()))
+
+
+# ── District distances ───────────────────────────────────
+def _load_distance_matrix():
+    """
+    The centroid distance matrix, rows / columns in centroid CSV
+    order. Built once and saved next to the CSV; later loads
+    memory-map the .npy. Rebuilt if the CSV is newer or resized.
+    """
+    n = len(centroids())
+    try:
+        if os.path.getmtime(DISTANCE_NPY) >= os.path.getmtime(CENTROIDS_CSV):
+            matrix = np.load(DISTANCE_NPY, mmap_mode='r')
+            if matrix.shape == (n, n):
+                return matrix
+    except (OSError, ValueError):
+        pass
+
+    c = centroids()
+    matrix = geo.distance_matrix(c['Latitude'], c['Longitude'])
+    tmp = f"{DISTANCE_NPY}.tmp{os.getpid()}.npy"
+    try:
+        np.save(tmp, matrix)
+        os.replace(tmp, DISTANCE_NPY)
+    except OSError:           # read-only deploy — keep it in memory
+        return matrix
+    return np.load(DISTANCE_NPY, mmap_mode='r')
+
+
+def district_index():
+    """{district: row, (district, state): row}, names lower-cased."""
+    return _once('district_index', lambda: geo.centroid_index(centroids()))
+
+
+def distance_matrix():
+    """(n, n) road km between centroid rows — see district_index()."""
+    return _view(_once('distance_matrix', _load_distance_matrix))
+
+
+# ── District ids ─────────────────────────────────────────
+def district_ids():
+    """DistrictIds — district id (centroid row) of any spelling."""
+    return _once('district_ids',
+                 lambda: districts.DistrictIds(centroids()))
+
+
+def _load_crosswalk(model_dir):
+    """
+    The crosswalk saved with a version; older versions have none,
+    so it is built here from the market table — not the price
+    history — and its unresolved names reported.
+    """
+    crosswalk = districts.load_crosswalk(model_dir)
+    if crosswalk is None:
+        crosswalk = districts.build_crosswalk(
+            district_ids(), centroids(), pincodes(), markets(model_dir))
+        districts.report(crosswalk)
+        print(f"   💡 python districts.py saves it with this version "
+              f"({districts.CROSSWALK_FILE})")
+    return crosswalk
+
+
+def district_crosswalk(model_dir):
+    """
+    District id of every spelling in the centroid, pincode and
+    price data of a model version (districts.CROSSWALK_COLUMNS).
+    Only the most recent directory is kept.
+    """
+    return _view(_keyed('district_crosswalk', model_dir,
+                        lambda: _load_crosswalk(model_dir)))
+
+
+# ── Memory report ────────────────────────────────────────
+def _nbytes(value):
+    if isinstance(value, tuple):          # (key, value) / (arrays, meta)
+        return sum(_nbytes(v) for v in value)
+    if isinstance(value, dict):
+        return sum(_nbytes(v) for v in value.values())
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    return getattr(value, 'nbytes', 0)   # arrays, PincodeIndex
+
+
+def memory_report(verbose=True):
+    """MB held per loaded dataset — each counted once per process."""
+    report = {name: _nbytes(value) / 2**20
+              for name, value in sorted(_store.items())}
+    if verbose:
+        print("📊 data_store memory:")
+        for name, mb in report.items():
+            print(f"   {name:<18} {mb:>8,.1f} MB")
+        print(f"   {'total':<18} {sum(report.values()):>8,.1f} MB")
+        if SHARED_DIR:
+            print(f"   price_history / lag_tables are memory-mapped from "
+                  f"{SHARED_DIR} (one copy per machine)")
+    return report
+
+
+if __name__ == '__main__':
+    import artifacts
+    _, model_dir = artifacts.resolve()
+    price_history(model_dir)
+    lag_tables(model_dir)
+    markets(model_dir)
+    centroids()
+    final_data()
+    pincodes()
+    pincode_index()
+    distance_matrix()
+    district_crosswalk(model_dir)
+    memory_report()
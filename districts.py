@@ -0,0 +1,444 @@
+"""
+districts.py
+============
+One integer id per district across the three datasets that name
+districts, each in its own spelling:
+  - district wise centroids.csv   coordinates (the id space)
+  - india pincode final.csv       a farmer's district, from a pincode
+  - clean_df.parquet              market districts of a model version
+Used by data_store.py, predict.py, recommender.py,
+recommendation_table.py, sms/sms_handler.py and app.py.
+
+A district's id is its centroid row — the first row of its
+(district, state) — so an id indexes data_store.distance_matrix()
+and the coordinates directly; UNKNOWN (-1) means no centroid.
+Spellings resolve through DISTRICT_ALIASES / STATE_ALIASES, the
+one alias table for every dataset.
+
+build_crosswalk() resolves every spelling of the three datasets
+once and reports the ones left unresolved; train_model.py and
+ingest.py save it with each model version as
+district_crosswalk.parquet, so a name that would get no
+distance is known when the version is built, not per request.
+
+Run: python districts.py [version]   (rebuild a version's crosswalk)
+
+Usage:
+    import data_store
+    ids = data_store.district_ids()
+    i = ids.id('Thoothukudi', 'Tamil Nadu')      # same as ...
+    ids.id('TUTICORIN', 'TAMIL NADU')           # the pincode spelling
+    ids.name(i)                                 # 'Thoothukudi'
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from geo import centroid_index
+
+UNKNOWN = -1
+
+MAX_RESOLVED = 100_000      # spellings remembered by a DistrictIds
+
+CROSSWALK_FILE    = 'district_crosswalk.parquet'
+CROSSWALK_COLUMNS = ['source', 'district', 'state', 'district_id', 'match']
+
+# How a spelling was resolved, best first
+MATCHES = ['exact', 'alias', 'other_state', 'unresolved']
+
+
+# ── Aliases ──────────────────────────────────────────────
+# Keys = lower-case spelling from the pincode CSV, the price data
+# (parquet) or common usage → Value = exact centroid-CSV spelling.
+# Names newer than the centroid CSV map to the district they were
+# carved out of ("nearest centroid").
+# Add entries here for names build_crosswalk() reports unresolved.
+DISTRICT_ALIASES = {
+    # Andhra Pradesh
+    "ananthapur":               "Anantapur",
+    "karim nagar":              "Karimnagar",
+    "k.v.rangareddy":           "Rangareddi",
+    "visakhapatnam":            "Vishakhapatnam",
+    "mahabub nagar":            "Mahbubnagar",
+
+    # Andaman & Nicobar
+    "south andaman":            "Andaman Islands",
+    "north and middle andaman": "Andaman Islands",
+    "nicobar":                  "Nicobar Islands",
+
+    # Assam
+    "dhubri":                   "Dhuburi",
+    "mammit":                   "Mamit",
+
+    # Bihar
+    "east champaran":           "Purba Champaran",
+    "west champaran":           "Pashchim Champaran",
+    "kaimur (bhabua)":          "Bhabua",
+    "palamau":                  "Palamu",
+    "arwal":                    "Jehanabad",        # nearest centroid
+
+    # Chhattisgarh
+    # was "Bijapur" in the SMS / web tables — Karnataka's Bijapur,
+    # ~1,000 km off; Chhattisgarh's Bijapur has no centroid
+    "bijapur(cgh)":             "Dantewada",        # nearest centroid
+    "bilaspur(cgh)":            "Bilaspur",
+    "gariaband":                "Raipur",           # nearest centroid
+    "narayanpur":               "Bastar",           # nearest centroid
+
+    # Delhi
+    "central delhi":            "Delhi",
+    "east delhi":               "Delhi",
+    "new delhi":                "Delhi",
+    "north delhi":              "Delhi",
+    "north west delhi":         "Delhi",
+    "south delhi":              "Delhi",
+    "south west delhi":         "Delhi",
+    "west delhi":               "Delhi",
+
+    # Daman & Diu
+    "diu":                      "Junagadh",
+
+    # Gujarat
+    "ahmedabad":                "Ahmadabad",
+    "ahmed nagar":              "Ahmednagar",
+    "banaskantha":              "Banas Kantha",
+    "gandhi nagar":             "Gandhinagar",
+    "sabarkantha":              "Sabar Kantha",
+    "surendra nagar":           "Surendranagar",
+    "tapi":                     "Surat",            # nearest centroid
+
+    # Himachal Pradesh
+    "bilaspur (hp)":            "Bilaspur",
+    "hamirpur(hp)":             "Hamirpur",
+    "lahul & spiti":            "Lahul And Spiti",
+
+    # J&K
+    "ananthnag":                "Anantnag (Kashmir South)",
+    "baramulla":                "Baramula (Kashmir North)",
+    "poonch":                   "Punch",
+    "reasi":                    "Rajauri",          # nearest centroid
+    "budgam":                   "Srinagar",         # nearest centroid
+    "kulgam":                   "Anantnag (Kashmir South)",
+    "bandipur":                 "Baramula (Kashmir North)",
+    "kupwara":                  "Kupwara (Muzaffarabad)",
+    "leh":                      "Ladakh (Leh)",
+
+    # Jharkhand
+    "giridh":                   "Giridih",
+    "khunti":                   "Ranchi",           # nearest centroid
+    "ramgarh":                  "Ranchi",           # nearest centroid
+    "seraikela-kharsawan":      "Saraikela Kharsawan",
+    "east singhbhum":           "Purba Singhbhum",
+    "west singhbhum":           "Pashchim Singhbhum",
+
+    # Karnataka
+    "bangalore":                "Bangalore Urban",
+    "chickmagalur":             "Chikmagalur",
+    "chikkaballapur":           "Chikmagalur",      # nearest centroid
+    "dakshina kannada":         "Dakshin Kannad",
+    "davangere":                "Davanagere",
+    "ramanagar":                "Bangalore Rural",  # nearest centroid
+    "krishnagiri":              "Dharmapuri",       # nearest centroid
+    "uttara kannada":           "Uttar Kannand",
+    "yadgir":                   "Gulbarga",         # nearest centroid
+    "bijapur(kar)":             "Bijapur",
+
+    # Kerala
+    "kasargod":                 "Kasaragod",
+    "pathanamthitta":           "Pattanamtitta",
+
+    # Madhya Pradesh
+    "alirajpur":                "Jhabua",           # nearest centroid
+    "ashok nagar":              "Ashoknagar",
+    "khargone":                 "East Nimar",
+    "rajnandgaon":              "Raj Nandgaon",
+    "singrauli":                "Sidhi",            # nearest centroid
+
+    # Maharashtra
+    "aurangabad(bh)":           "Aurangabad",
+    "beed":                     "Bid",
+    "buldhana":                 "Buldana",
+    "gadchiroli":               "Garhchiroli",
+    "gondia":                   "Gondiya",
+    "mumbai":                   "Greater Bombay",
+    "raigarh(mh)":              "Raigarh",
+
+    # Manipur
+    "imphal east":              "East Imphal",
+    "imphal west":              "West Imphal",
+
+    # Meghalaya
+    "ri bhoi":                  "Ri-Bhoi",
+
+    # Nagaland
+    "kiphire":                  "Tuensang",         # nearest centroid
+    "longleng":                 "Mokokchung",       # nearest centroid
+    "peren":                    "Kohima",           # nearest centroid
+    "zunhebotto":               "Zunheboto",
+
+    # Odisha
+    "balangir":                 "Bolangir",
+    "baleswar":                 "Baleshwar",
+    "bargarh":                  "Baragarh",
+    "debagarh":                 "Deogarh",
+    "jagatsinghapur":           "Jagatsinghpur",
+    "jajapur":                  "Jajpur",
+    "kendujhar":                "Keonjhar",
+    "khorda":                   "Khordha",
+    "nabarangapur":             "Nabarangpur",
+    "sonapur":                  "Sonepur",
+    "sundergarh":               "Sundargarh",
+
+    # Puducherry
+    "pondicherry":              "Puducherry",
+
+    # Punjab
+    "nawanshahr":               "Nawan Shehar",
+    "ropar":                    "Rupnagar",
+    "mohali":                   "Rupnagar",         # nearest centroid
+    "tarn taran":               "Amritsar",         # nearest centroid
+    "barnala":                  "Sangrur",          # nearest centroid
+    "fazilka":                  "Firozpur",         # nearest centroid
+
+    # Rajasthan
+    "chittorgarh":              "Chittaurgarh",
+    "dholpur":                  "Dhaulpur",
+    "jhujhunu":                 "Jhunjhunun",
+
+    # Tamil Nadu
+    "tiruchirappalli":          "Tiruchchirappalli",
+    "tiruchirapalli":           "Tiruchchirappalli",
+    "thiruchirappalli":         "Tiruchchirappalli",
+    "tiruchi":                  "Tiruchchirappalli",
+    "trichy":                   "Tiruchchirappalli",
+    "tirunelveli":              "Tirunelveli Kattabo",
+    "tiruvallur":               "Thiruvallur",
+    "tiruvarur":                "Thiruvarur",
+    "kanchipuram":              "Kancheepuram",
+    "the nilgiris":             "Nilgiris",
+    "tuticorin":                "Thoothukudi",
+    "kanyakumari":              "Kanniyakumari",
+    "chengalpattu":             "Kancheepuram",     # nearest centroid
+    "ranipet":                  "Vellore",          # nearest centroid
+    # was "Tirupur" in the SMS / web tables, which is not a
+    # centroid (distance 999 km); carved out of Coimbatore
+    "tiruppur":                 "Coimbatore",       # nearest centroid
+    "tirupur":                  "Coimbatore",       # nearest centroid
+
+    # Uttar Pradesh
+    "barabanki":                "Bara Banki",
+    "bagpat":                   "Baghpat",
+    "raebareli":                "Rae Bareli",
+    "sant ravidas nagar":       "Sant Ravi Das Nagar",
+    "siddharthnagar":           "Siddharth Nagar",
+    "shrawasti":                "Shravasti",
+    "budaun":                   "Badaun",
+    "kanpur nagar":             "Kanpur",
+    "kheri":                    "Lakhimpur Kheri",
+
+    # Uttarakhand
+    "dehradun":                 "Dehra Dun",
+    "nainital":                 "Naini Tal",
+    "rudraprayag":              "Rudra Prayag",
+
+    # West Bengal
+    "bardhaman":                "Barddhaman",
+    "howrah":                   "Haora",
+    "malda":                    "Maldah",
+    "north dinajpur":           "Uttar Dinajpur",
+    "south dinajpur":           "Dakshin Dinajpur",
+    "hooghly":                  "Hugli",
+    "medinipur":                "West Midnapore",
+    "cooch behar":              "Kochbihar",
+
+    # Haryana
+    "sonipat":                  "Sonepat",
+
+    # Other / Union Territories
+    "dadra & nagar haveli":     "Dadra And Nagar Haveli",
+    "lakshadweep":              "Kavaratti",
+    "east sikkim":              "East",
+    "dibang valley":            "Upper Dibang Valley",
+}
+
+# Keys = lower-case state with '&' spelled 'and' → centroid-CSV state
+STATE_ALIASES = {
+    "odisha":                      "Orissa",
+    "uttarakhand":                 "Uttaranchal",
+    "uttrakhand":                  "Uttaranchal",
+    "chattisgarh":                 "Chhattisgarh",
+    "pondicherry":                 "Puducherry",
+    "andaman and nicobar islands": "Andaman and Nicobar",
+    "telangana":                   "Andhra Pradesh",
+    "nct of delhi":                "Delhi",
+}
+
+
+def _state_key(state):
+    """Lower-case centroid spelling of a state ('' if none)."""
+    if not isinstance(state, str):
+        return ''
+    key = ' '.join(state.replace('&', ' and ').split()).lower()
+    return STATE_ALIASES.get(key, key).lower()
+
+
+# ── Resolution ───────────────────────────────────────────
+class DistrictIds:
+    """Spelling → district id over a centroid table."""
+
+    def __init__(self, centroids):
+        self.districts = centroids['District'].to_numpy(dtype=object)
+        self.states    = centroids['State'].to_numpy(dtype=object)
+        self._index    = centroid_index(centroids)
+        self._resolved = {}      # (district, state) → (id, match)
+
+    def __len__(self):
+        return len(self.districts)
+
+    def resolve(self, district, state=None):
+        """
+        (id, match) of a district spelling, preferring the district
+        in `state`: match is one of MATCHES — other_state when the
+        name is only known in another state, (UNKNOWN, 'unresolved')
+        when no centroid has it.
+        """
+        found = self._resolved.get((district, state))
+        if found is not None:
+            return found
+        found = (UNKNOWN, 'unresolved')
+        if isinstance(district, str) and district.strip():
+            key   = district.strip().lower()
+            alias = DISTRICT_ALIASES.get(key)
+            names = [(key, 'exact')]
+            if alias is not None:
+                names.append((alias.lower(), 'alias'))
+            st = _state_key(state)
+            found = (
+                next(((self._index[(n, st)], how) for n, how in names
+                      if (n, st) in self._index), None) or
+                next(((self._index[n], how if not st else 'other_state')
+                      for n, how in names if n in self._index), None) or
+                found)
+        if len(self._resolved) < MAX_RESOLVED:
+            self._resolved[(district, state)] = found
+        return found
+
+    def id(self, district, state=None):
+        """District id of a spelling, or UNKNOWN."""
+        return self.resolve(district, state)[0]
+
+    def ids(self, districts, states):
+        """int64 array of district ids, one per (district, state)."""
+        return np.fromiter((self.id(d, s) for d, s in zip(districts, states)),
+                           dtype=np.int64, count=len(districts))
+
+    def name(self, district_id):
+        """Centroid spelling of an id, or None for UNKNOWN."""
+        if district_id == UNKNOWN:
+            return None
+        return self.districts[district_id]
+
+    def canonical(self, district, state=None):
+        """Centroid spelling of a district, or the name title-cased if unknown."""
+        district_id = self.id(district, state)
+        if district_id == UNKNOWN:
+            return district.strip().title()
+        return self.districts[district_id]
+
+
+# ── Crosswalk ────────────────────────────────────────────
+def build_crosswalk(ids, centroids, pincodes, markets):
+    """
+    Every distinct (district, state) spelling of the three
+    datasets with its district id and how it resolved.
+
+    Parameters
+    ----------
+    ids        : DistrictIds
+    centroids  : DataFrame  District, State
+    pincodes   : DataFrame  Districtname, statename
+    markets    : DataFrame  district, state (price data)
+
+    Returns
+    -------
+    DataFrame with CROSSWALK_COLUMNS, one row per source and
+    spelling
+    """
+    sources = [('centroid', centroids['District'], centroids['State']),
+               ('pincode',  pincodes['Districtname'], pincodes['statename']),
+               ('parquet',  markets['district'], markets['state'])]
+    rows = []
+    for source, districts, states in sources:
+        pairs = pd.DataFrame({'district': np.asarray(districts, dtype=object),
+                              'state':    np.asarray(states, dtype=object)})
+        pairs = pairs[pairs['district'].map(lambda d: isinstance(d, str))]
+        for d, s in pairs.drop_duplicates().itertuples(index=False, name=None):
+            rows.append((source, d, s if isinstance(s, str) else None,
+                         *ids.resolve(d, s)))
+    return pd.DataFrame(rows, columns=CROSSWALK_COLUMNS).astype(
+        {'district_id': np.int64})
+
+
+def id_map(crosswalk, source):
+    """{(district, state): district id} for one source of a crosswalk."""
+    rows = crosswalk[crosswalk['source'] == source]
+    return dict(zip(zip(rows['district'], rows['state']), rows['district_id']))
+
+
+def report(crosswalk):
+    """Print how each source resolved, listing the names left without an id."""
+    print("🗺  District crosswalk:")
+    for source, rows in crosswalk.groupby('source', sort=False):
+        counts = rows['match'].value_counts()
+        print(f"   {source:<9} {len(rows):>5,} spellings — " +
+              ", ".join(f"{counts.get(m, 0):,} {m}" for m in MATCHES))
+        for match, mark in (('other_state', '⚠️ '), ('unresolved', '❌')):
+            found = rows[rows['match'] == match]
+            if len(found):
+                names = ", ".join(f"{d} ({s})" for d, s in
+                                  zip(found['district'], found['state']))
+                print(f"   {mark} {match}: {names}")
+
+
+def save_crosswalk(crosswalk, model_dir):
+    """Write a version's crosswalk as model_dir/CROSSWALK_FILE."""
+    crosswalk.to_parquet(os.path.join(model_dir, CROSSWALK_FILE), index=False)
+
+
+def load_crosswalk(model_dir):
+    """A version's saved crosswalk, or None if it has none (older versions)."""
+    try:
+        return pd.read_parquet(os.path.join(model_dir, CROSSWALK_FILE))
+    except FileNotFoundError:
+        return None
+
+
+def write_crosswalk(model_dir, markets):
+    """
+    Build step: the crosswalk of a model version whose price data
+    is `markets` (district, state columns), reported and saved
+    with the version. Returns the crosswalk.
+    """
+    import data_store
+
+    crosswalk = build_crosswalk(data_store.district_ids(),
+                                data_store.centroids(),
+                                data_store.pincodes(), markets)
+    report(crosswalk)
+    save_crosswalk(crosswalk, model_dir)
+    return crosswalk
+
+
+# ── Build step for an existing version ───────────────────
+if __name__ == '__main__':
+    import artifacts
+    import data_store
+
+    version, model_dir = artifacts.resolve(sys.argv[1] if len(sys.argv) > 1
+                                           else None)
+    crosswalk = write_crosswalk(model_dir, data_store.markets(model_dir))
+    print(f"   ✅ {len(crosswalk):,} rows → "
+          f"{os.path.join(model_dir, CROSSWALK_FILE)} ({version})")
@@ -0,0 +1,192 @@
+"""
+geo.py
+======
+District geometry helpers — road distance between centroids.
+Used by data_store.py (distance matrix) and recommender.py.
+
+Functions and a grid index over plain arrays; loading and caching the centroid
+table and the persisted distance matrix is data_store's job.
+
+Usage:
+    from geo import haversine, centroid_index, distance_matrix
+    km   = haversine(11.0, 76.9, 11.6, 78.1)
+    rows = centroid_index(centroids)      # name(s) → row
+    D    = distance_matrix(centroids['Latitude'], centroids['Longitude'])
+
+    # Radius queries over many points
+    from geo import GridIndex
+    grid = GridIndex(latitudes, longitudes)
+    points, km = grid.within(11.0, 76.9, radius_km=150)
+
+    python geo.py          # grid vs brute-force benchmark
+"""
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371
+ROAD_FACTOR     = 1.3      # straight line → approximate road distance
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Straight-line distance × 1.3 ≈ road distance."""
+    R = EARTH_RADIUS_KM
+    lat1, lon1, lat2, lon2 = map(
+        np.radians, [lat1, lon1, lat2, lon2])
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = (np.sin(dlat/2)**2 +
+         np.cos(lat1) * np.cos(lat2) *
+         np.sin(dlon/2)**2)
+    straight = R * 2 * np.arctan2(
+        np.sqrt(a), np.sqrt(1-a))
+    return np.round(straight * ROAD_FACTOR, 1)
+
+
+def centroid_index(centroids):
+    """
+    {district: row, (district, state): row} over a centroid
+    table, names lower-cased. The first matching row wins, as
+    with a boolean-mask lookup.
+    """
+    rows = {}
+    for i, (d, s) in enumerate(zip(centroids['District'],
+                                   centroids['State'])):
+        if not isinstance(d, str):
+            continue
+        rows.setdefault(d.lower(), i)
+        if isinstance(s, str):
+            rows.setdefault((d.lower(), s.lower()), i)
+    return rows
+
+
+def centroid_row(index, district, state=None):
+    """
+    Row of a district in a centroid_index (preferring the one
+    in `state`), or None if unknown.
+    """
+    key = district.lower()
+    if state:
+        row = index.get((key, state.lower()))
+        if row is not None:
+            return row
+    return index.get(key)
+
+
+def distance_matrix(latitude, longitude):
+    """
+    (n, n) float64 road distances between n centroids —
+    entry [i, j] equals haversine(lat[i], lon[i], lat[j], lon[j]).
+    """
+    lat = np.asarray(latitude, dtype=np.float64)
+    lon = np.asarray(longitude, dtype=np.float64)
+    out = np.empty((len(lat), len(lat)), dtype=np.float64)
+    for i in range(len(lat)):       # row by row, like a per-origin lookup
+        out[i] = haversine(lat[i], lon[i], lat, lon)
+    return out
+
+
+# ── Spatial index ────────────────────────────────────────
+class GridIndex:
+    """
+    Points bucketed into a lat / lon grid of `cell_deg` degree
+    cells, for radius queries in road km. A query only visits
+    the cells overlapping the radius' bounding box, then checks
+    those points with the exact haversine.
+    """
+
+    def __init__(self, latitude, longitude, cell_deg=1.0):
+        self.lat  = np.asarray(latitude, dtype=np.float64)
+        self.lon  = np.asarray(longitude, dtype=np.float64)
+        self.cell = cell_deg
+        self._n_lon = int(np.ceil(360 / cell_deg))
+        keys = self._cell_row(self.lat) * self._n_lon + \
+               self._cell_col(self.lon)
+        self._order = np.argsort(keys, kind='stable')
+        self._keys  = keys[self._order]
+
+    def __len__(self):
+        return len(self.lat)
+
+    def _cell_row(self, lat):
+        return np.floor((np.asarray(lat) + 90) / self.cell).astype(np.int64)
+
+    def _cell_col(self, lon):
+        return (np.floor((np.asarray(lon) + 180) / self.cell)
+                .astype(np.int64) % self._n_lon)
+
+    def candidates(self, lat, lon, radius_km):
+        """
+        Sorted indices of the points in the cells a radius of
+        radius_km road km can reach — a superset of within().
+        """
+        # a little over the radius: distances are rounded to 0.1 km
+        angle = (radius_km + 0.1) / ROAD_FACTOR / EARTH_RADIUS_KM
+        if angle >= np.pi:
+            return np.arange(len(self))
+        lat_lo = max(lat - np.degrees(angle), -90.0)
+        lat_hi = min(lat + np.degrees(angle),  90.0)
+        # widest longitude span of a spherical cap around (lat, lon)
+        cos_lat = np.cos(np.radians(lat))
+        if np.sin(angle) >= cos_lat:
+            dlon = 180.0
+        else:
+            dlon = np.degrees(np.arcsin(np.sin(angle) / cos_lat))
+
+        if dlon >= 180.0:
+            cols = np.arange(self._n_lon)
+        else:
+            first = int(self._cell_col(lon - dlon))
+            last  = int(self._cell_col(lon + dlon))
+            cols  = (np.arange(first, first + (last - first) % self._n_lon + 1)
+                     % self._n_lon)
+        rows = np.arange(int(self._cell_row(lat_lo)),
+                         int(self._cell_row(lat_hi)) + 1)
+        keys = (rows[:, None] * self._n_lon + cols[None, :]).ravel()
+        lo = np.searchsorted(self._keys, keys, side='left')
+        hi = np.searchsorted(self._keys, keys, side='right')
+        if not (hi > lo).any():
+            return np.empty(0, dtype=np.int64)
+        found = np.concatenate([self._order[a:b]
+                                for a, b in zip(lo, hi) if b > a])
+        return np.sort(found)
+
+    def within(self, lat, lon, radius_km):
+        """(indices, road km) of the points within radius_km, in index order."""
+        idx = self.candidates(lat, lon, radius_km)
+        km  = haversine(lat, lon, self.lat[idx], self.lon[idx])
+        keep = km <= radius_km
+        return idx[keep], km[keep]
+
+
+# ── Benchmark: grid vs brute force ───────────────────────
+if __name__ == '__main__':
+    import time
+
+    rng = np.random.default_rng(0)
+
+    def _best(fn, repeat=20):
+        best = float('inf')
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - t0)
+        return best * 1000
+
+    print(f"{'points':>8} {'radius':>7} {'candidates':>11} {'within':>7}"
+          f" {'grid':>9} {'brute':>9}")
+    for n in (1_000, 10_000, 100_000):
+        # markets scattered over India's bounding box
+        lat = rng.uniform(8, 35, n)
+        lon = rng.uniform(68, 97, n)
+        grid = GridIndex(lat, lon)
+        q_lat, q_lon = 11.0, 76.96          # Coimbatore
+        for radius in (50, 150, 300, 1000):
+            idx, km = grid.within(q_lat, q_lon, radius)
+            brute = haversine(q_lat, q_lon, lat, lon)
+            assert np.array_equal(idx, np.flatnonzero(brute <= radius))
+            cand = len(grid.candidates(q_lat, q_lon, radius))
+            grid_ms  = _best(lambda: grid.within(q_lat, q_lon, radius))
+            brute_ms = _best(lambda: np.flatnonzero(
+                haversine(q_lat, q_lon, lat, lon) <= radius))
+            print(f"{n:>8,} {radius:>5}km {cand:>11,} {len(idx):>7,}"
+                  f" {grid_ms:>7.3f}ms {brute_ms:>7.3f}ms")
@@ -0,0 +1,62 @@
+"""
+gunicorn.conf.py
+================
+gunicorn settings for the SMS webhook (see Procfile).
+
+Workers share the lag tables (and, for older model versions, the
+price history they are derived from) through read-only
+memory-mapped files (data_store.shared_arrays): the master publishes
+them once before forking, each worker maps them on start, so adding
+workers does not add copies of the data.
+
+The default stays at one worker: sms_handler keeps registered users and
+sessions in JSON files it reads and rewrites without a lock, so two
+workers handling messages at once can lose each other's writes. Raise
+WEB_CONCURRENCY only once those writes are safe.
+
+Usage:
+    gunicorn sms.sms_handler:app -c gunicorn.conf.py --bind 0.0.0.0:$PORT
+"""
+
+import os
+import tempfile
+import time
+
+# Must be set before data_store is imported anywhere
+os.environ.setdefault(
+    'FASAL_SHARED_DIR',
+    '/dev/shm/fasal-to-faida' if os.path.isdir('/dev/shm')
+    else os.path.join(tempfile.gettempdir(), 'fasal-to-faida'))
+
+# one worker until sms_handler's JSON writes are locked (see docstring)
+workers = int(os.environ.get('WEB_CONCURRENCY', '1'))
+timeout = 60
+
+
+def _attach_shared():
+    import artifacts
+    import data_store
+    _, model_dir = artifacts.resolve()
+    # serving reads the snapshot and markets.parquet — the price
+    # history itself is only loaded for versions saved without them
+    data_store.lag_tables(model_dir)
+
+
+def on_starting(server):
+    """Publish the shared arrays once, in the master."""
+    t0 = time.perf_counter()
+    _attach_shared()
+    server.log.info("📦 Shared arrays published to %s in %.2fs",
+                    os.environ['FASAL_SHARED_DIR'], time.perf_counter() - t0)
+
+
+def post_worker_init(worker):
+    """Map the shared arrays and log what this worker costs."""
+    from history import pss_mb, rss_mb
+    t0 = time.perf_counter()
+    _attach_shared()
+    rss, pss = rss_mb(), pss_mb()
+    worker.log.info("⚡ Worker %s attached in %.3fs — RSS %s MB, PSS %s MB",
+                    worker.pid, time.perf_counter() - t0,
+                    f"{rss:,.0f}" if rss is not None else "?",
+                    f"{pss:,.0f}" if pss is not None else "?")
@@ -0,0 +1,373 @@
+"""
+history.py
+==========
+Per-series price history index.
+Used by predict.py, recommender.py and train_model.py.
+
+Each (commodity, market), (commodity, district) and
+(commodity, state) key maps to a date-sorted, contiguous
+slice of prices, so a history lookup is one dict access
+plus array slicing instead of a boolean scan of the table.
+
+A version's price history is clean_df.parquet (written by
+train_model.py) plus one clean_df.part-<version>.parquet per
+batch ingest.py appended since — see history_files().
+
+Usage:
+    from history import load_price_history, build_series_index
+    df     = load_price_history('model')
+    index  = build_series_index(df, 'market')
+    series = index[('Tomato', 'Salem')]
+    print(series.modal_price[-90:], series.last_date)
+
+    # Serving snapshot — lag / rolling features per series
+    from history import build_snapshot
+    snapshot = build_snapshot(df)
+"""
+
+import glob
+import os
+import sys
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# Levels the history lookup falls back through, in order
+HISTORY_LEVELS = ['market', 'district', 'state']
+
+# Columns serving needs from clean_df.parquet (it also holds every
+# engineered training column)
+NAME_COLUMNS  = ['state', 'district', 'market', 'commodity']
+PRICE_COLUMNS = ['modal_price', 'min_price', 'max_price']
+SERVING_COLUMNS = NAME_COLUMNS + ['price_date'] + PRICE_COLUMNS
+
+# Files of a version's price history: the training frame, then one
+# part per ingested batch (parts sort in version order)
+HISTORY_FILE  = 'clean_df.parquet'
+HISTORY_PARTS = 'clean_df.part-*.parquet'
+
+# Distinct markets per commodity, saved with every version so the
+# serving side can list them without reading the history
+MARKETS_FILE   = 'markets.parquet'
+MARKET_COLUMNS = ['commodity', 'market', 'district', 'state']
+
+# Rows of history the lag / rolling features look back over
+LOOKBACK = 90
+
+# Fallback levels pool many markets: their series hold one
+# aggregate row per date (median of each price over the markets
+# reporting that day) rather than every market's raw rows
+AGGREGATE_LEVELS = ['district', 'state']
+
+# Bumped whenever build_snapshot's output changes meaning;
+# recorded in the manifest so ingest.py knows when to rebuild
+SNAPSHOT_VERSION = 2
+
+# Lag / rolling features derived from a series' recent history
+HISTORY_FEATURES = [
+    'lag_7d', 'lag_14d', 'lag_30d', 'lag_60d',
+    'roll_7d', 'roll_30d', 'roll_90d',
+    'momentum', 'volatility',
+    'price_range', 'min_price', 'max_price',
+]
+
+SNAPSHOT_COLUMNS = ['level', 'commodity', 'key',
+                    'n_rows', 'last_date'] + HISTORY_FEATURES
+
+# One series: aligned price arrays + its date span
+Series = namedtuple('Series', [
+    'modal_price', 'min_price', 'max_price',
+    'price_date', 'first_date', 'last_date',
+])
+
+
+def rss_mb():
+    """Resident memory of this process in MB (Linux; None elsewhere)."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def pss_mb():
+    """
+    Proportional set size of this process in MB — pages shared with
+    other processes are split between them (Linux; None elsewhere).
+    """
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                if line.startswith('Pss:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def to_day_number(dates):
+    """datetime64 values (or day numbers already) → int32 days since 1970-01-01."""
+    dates = np.asarray(dates)
+    if np.issubdtype(dates.dtype, np.datetime64):
+        dates = dates.astype('datetime64[D]').astype(np.int64)
+    return dates.astype(np.int32)
+
+
+def compact_prices(values):
+    """
+    float32 copy of a price column if that loses nothing (every
+    value, NaN aside, round-trips exactly), else float64 — so a
+    snapshot built from the compact history equals one built
+    from the float64 training frame.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    small  = values.astype(np.float32)
+    same   = (small == values) | np.isnan(values)
+    return small if same.all() else values
+
+
+def history_files(model_dir):
+    """Parquet files holding a version's price history, oldest first."""
+    return ([os.path.join(model_dir, HISTORY_FILE)] +
+            sorted(glob.glob(os.path.join(model_dir, HISTORY_PARTS))))
+
+
+def read_history(model_dir, columns=SERVING_COLUMNS, filters=None):
+    """
+    Rows of a version's price history (base file and every part,
+    in that order) as one frame. `filters` is passed to pyarrow,
+    so only the matching row groups / rows are materialized.
+    """
+    frames = [pd.read_parquet(path, columns=columns, filters=filters)
+              for path in history_files(model_dir)]
+    if len(frames) == 1:
+        return frames[0]
+    return pd.concat(frames, ignore_index=True)
+
+
+def load_price_history(path, verbose=True):
+    """
+    Read the serving columns of a price history — a model version
+    directory (base file plus parts) or one parquet file — in a
+    compact layout:
+      - state / district / market / commodity as categoricals
+      - prices as float32 when every value is exactly representable
+        (whole rupees below 2**24 are), float64 otherwise — see
+        compact_prices
+      - price_date as int32 day numbers (see to_day_number)
+    Reports resident memory before and after the load.
+    """
+    rss_before = rss_mb()
+    df = (read_history(path) if os.path.isdir(path)
+          else pd.read_parquet(path, columns=SERVING_COLUMNS))
+    for col in NAME_COLUMNS:
+        df[col] = df[col].astype('category')
+    for col in PRICE_COLUMNS:
+        df[col] = compact_prices(df[col].to_numpy())
+    df['price_date'] = to_day_number(df['price_date'].to_numpy())
+    if verbose:
+        rss_after = rss_mb()
+        frame_mb  = df.memory_usage(deep=True).sum() / 2**20
+        rss = (f", RSS {rss_before:,.0f} → {rss_after:,.0f} MB"
+               if rss_before is not None else "")
+        print(f"   📉 {os.path.basename(os.path.normpath(path))}: "
+              f"{len(df):,} rows, "
+              f"{frame_mb:,.1f} MB in memory{rss}")
+    return df
+
+
+def build_markets(df):
+    """
+    Distinct MARKET_COLUMNS rows of a price frame: commodities in
+    order of first appearance, each commodity's rows in order of
+    first appearance. Appending rows to `df` only appends to the
+    table, so build_markets(pd.concat([markets, batch])) equals
+    the table of the history with the batch appended.
+    """
+    rows = df[MARKET_COLUMNS].astype(object)
+    rows = rows[rows['commodity'].notna()].drop_duplicates()
+    order = pd.factorize(rows['commodity'])[0]
+    return rows.iloc[np.argsort(order, kind='stable')]\
+        .reset_index(drop=True)
+
+
+def load_markets(model_dir):
+    """
+    The market table of a version — markets.parquet, or for
+    versions saved before it, built from the history's name
+    columns.
+    """
+    path = os.path.join(model_dir, MARKETS_FILE)
+    if os.path.exists(path):
+        return pd.read_parquet(path).astype(object)
+    return build_markets(read_history(model_dir, columns=MARKET_COLUMNS))
+
+
+def build_series_index(df, level):
+    """
+    Build {(commodity, <level>): Series} from a price frame.
+
+    Rows are sorted once by (commodity, level, price_date) —
+    stable, so same-day rows keep their table order — and
+    every series becomes a view into those sorted arrays.
+    """
+    d = df[['commodity', level, 'price_date',
+            'modal_price', 'min_price', 'max_price']]\
+        .sort_values(['commodity', level, 'price_date'],
+                     kind='mergesort')
+
+    commodity = d['commodity'].to_numpy(dtype=object)
+    key       = d[level].to_numpy(dtype=object)
+    modal     = d['modal_price'].to_numpy()
+    mins      = d['min_price'].to_numpy()
+    maxs      = d['max_price'].to_numpy()
+    dates     = d['price_date'].to_numpy()
+
+    n = len(d)
+    if n == 0:
+        return {}
+    change = ((commodity[1:] != commodity[:-1]) |
+              (key[1:]       != key[:-1]))
+    starts = np.concatenate(([0], np.flatnonzero(change) + 1))
+    stops  = np.concatenate((starts[1:], [n]))
+
+    return {
+        (commodity[s], key[s]): Series(
+            modal[s:e], mins[s:e], maxs[s:e], dates[s:e],
+            dates[s], dates[e - 1])
+        for s, e in zip(starts, stops)
+    }
+
+
+def daily_aggregate(df, level):
+    """
+    One row per (commodity, <level>, price_date): the median
+    modal / min / max price over the markets reporting that day.
+    Returns the columns build_series_index() needs.
+    """
+    return df.groupby(['commodity', level, 'price_date'],
+                      observed=True, sort=False)[PRICE_COLUMNS]\
+             .median().reset_index()
+
+
+def tail(series, n):
+    """Last n rows of a series (still a view)."""
+    return Series(
+        series.modal_price[-n:],
+        series.min_price[-n:],
+        series.max_price[-n:],
+        series.price_date[-n:],
+        series.price_date[-n:][0],
+        series.last_date,
+    )
+
+
+def series_features(hist):
+    """
+    Lag / rolling features from a recent-history Series
+    (at most LOOKBACK rows). Returns values in
+    HISTORY_FEATURES order. Computed in float64 whatever the
+    storage dtype.
+    """
+    prices = np.asarray(hist.modal_price, dtype=np.float64)
+    n      = len(prices)
+    mean   = prices.mean()
+    last_min = float(hist.min_price[-1])
+    last_max = float(hist.max_price[-1])
+    return np.array([
+        # Lag features from recent history
+        prices[-7]  if n >= 7  else mean,
+        prices[-14] if n >= 14 else mean,
+        prices[-30] if n >= 30 else mean,
+        prices[-60] if n >= 60 else mean,
+        # Rolling averages
+        prices[-7:].mean(),
+        prices[-30:].mean(),
+        mean,
+        # Other signals
+        prices[-1] - (prices[-30] if n >= 30 else mean),
+        float(prices.std(ddof=1)) if n > 1 else 0.0,
+        last_max - last_min,
+        last_min,
+        last_max,
+    ])
+
+
+def build_snapshot(df, levels=HISTORY_LEVELS):
+    """
+    Serving snapshot of a price frame: one row per
+    (level, commodity, key) with the HISTORY_FEATURES of its
+    last LOOKBACK rows precomputed, plus the row count and
+    latest date used by the fallback and staleness checks.
+    District / state series are daily aggregates (see
+    daily_aggregate), so n_rows counts reporting days there.
+    """
+    frames = []
+    for level in levels:
+        source = (daily_aggregate(df, level) if level in AGGREGATE_LEVELS
+                  else df)
+        rows = []
+        for (commodity, key), series in \
+                build_series_index(source, level).items():
+            if not isinstance(key, str):
+                continue   # missing name — can never be queried
+            hist = tail(series, LOOKBACK)
+            rows.append((level, commodity, key,
+                         len(hist.modal_price), series.last_date,
+                         *series_features(hist)))
+        frames.append(pd.DataFrame(rows, columns=SNAPSHOT_COLUMNS))
+    return pd.concat(frames, ignore_index=True)
+
+
+def touched_filter(batch):
+    """
+    pyarrow filter selecting the history rows of every series
+    `batch` touches (at any HISTORY_LEVELS level) — a superset
+    is fine, update_snapshot matches the series exactly.
+    """
+    commodities = ('commodity', 'in', sorted(set(batch['commodity'])))
+    return [[commodities, (level, 'in', sorted(set(batch[level].dropna())))]
+            for level in HISTORY_LEVELS]
+
+
+def update_snapshot(snapshot, df, batch):
+    """
+    Snapshot with only the series that `batch` touches
+    recomputed from `df` (the history, batch included — it only
+    needs every row of the touched series, see touched_filter);
+    every other row is kept as-is. Gives the same rows as
+    build_snapshot(<full history>), in a different order.
+    """
+    keep   = np.ones(len(snapshot), dtype=bool)
+    frames = []
+    for level in HISTORY_LEVELS:
+        touched = set(zip(batch['commodity'], batch[level]))
+        rows = pd.MultiIndex.from_arrays(
+            [df['commodity'].astype(object), df[level].astype(object)]
+        ).isin(touched)
+        frames.append(build_snapshot(df[rows], levels=[level]))
+        keep &= ~((snapshot['level'] == level).to_numpy() &
+                  pd.MultiIndex.from_arrays(
+                      [snapshot['commodity'], snapshot['key']]
+                  ).isin(touched))
+    return pd.concat([snapshot[keep]] + frames, ignore_index=True)
+
+
+# ── Memory comparison: full frame vs compact serving layout ──
+if __name__ == '__main__':
+    path = sys.argv[1] if len(sys.argv) > 1 else 'model'
+
+    full = (read_history(path, columns=None) if os.path.isdir(path)
+            else pd.read_parquet(path))
+    full_mb = full.memory_usage(deep=True).sum() / 2**20
+    print(f"Full frame    : {full.shape[1]} columns, {full_mb:,.1f} MB")
+    del full
+
+    compact = load_price_history(path)
+    compact_mb = compact.memory_usage(deep=True).sum() / 2**20
+    print(f"Compact frame : {compact.shape[1]} columns, {compact_mb:,.1f} MB "
+          f"({full_mb / compact_mb:,.1f}x smaller)")
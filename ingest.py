@@ -0,0 +1,205 @@
+"""
+ingest.py
+=========
+Append a batch of daily mandi prices to the serving history
+without retraining.
+Run: python ingest.py <prices.csv> [--table [year]]
+     (same schema as datasets/Agriculture_price_dataset.csv;
+      --table rebuilds the new version's recommendation table,
+      default this year — see recommendation_table.py)
+
+The batch is cleaned exactly like train_model.py cleans the
+training data, then published as a new model version (see
+artifacts.py) that keeps the current model, encoders, features
+and price history files (hard-linked, not retrained or
+rewritten) and adds:
+  - clean_df.part-<version>.parquet  the new rows only
+                              (history.history_files)
+  - serving_snapshot.parquet  only the series the batch touches
+                              recomputed (history.update_snapshot)
+  - markets.parquet           the parent's market table plus the
+                              batch's new markets
+  - district_crosswalk.parquet  district ids of every spelling,
+                              new districts reported (districts.py)
+Only the rows of the series the batch touches are read back from
+the history, so an ingest costs O(batch), not O(history).
+
+model/current is switched at the end. Running processes do not
+see the batch until predict.watch_for_updates() next polls the
+pointer (every 300 s by default) and hot-swaps to the new version.
+
+Rows already in the history (same market, commodity and date)
+are skipped, so re-running a batch is harmless.
+"""
+
+import datetime
+import os
+import shutil
+import sys
+import time
+
+import joblib
+import pandas as pd
+
+from artifacts import (new_version, read_manifest, resolve, set_current,
+                       write_manifest)
+from districts import write_crosswalk
+from history import (HISTORY_PARTS, MARKET_COLUMNS, MARKETS_FILE,
+                     SERVING_COLUMNS, SNAPSHOT_VERSION, build_markets,
+                     build_snapshot, history_files, load_markets,
+                     read_history, touched_filter, update_snapshot)
+from tree_eval import TREES_FILE
+
+# Files carried over unchanged from the parent version
+MODEL_FILES = ['price_model.joblib', 'encoders.joblib', 'features.joblib',
+               TREES_FILE]
+
+# Identifies one price row; a batch row matching an existing one is skipped
+ROW_KEY = ['state', 'district', 'market', 'commodity', 'price_date']
+
+STATE_FIX = {
+    'tamilnadu':          'Tamil Nadu',
+    'tamil nadu':         'Tamil Nadu',
+    'jammu & kashmir':    'Jammu and Kashmir',
+    'jammu and kashmir':  'Jammu and Kashmir',
+    'chattisgarh':        'Chhattisgarh',
+    'chhattisgarh':       'Chhattisgarh',
+    'uttrakhand':         'Uttarakhand',
+    'orissa':             'Odisha',
+    'gao':                'Goa',
+}
+
+
+def clean_prices(df):
+    """
+    Standardize a raw Agriculture_price_dataset.csv frame:
+    column names, state / district spellings, dates, prices,
+    and drop rows without a date or a positive modal price.
+    """
+    df = df.rename(columns={
+        'STATE':          'state',
+        'District Name':  'district',
+        'Market Name':    'market',
+        'Commodity':      'commodity',
+        'Min_Price':      'min_price',
+        'Max_Price':      'max_price',
+        'Modal_Price':    'modal_price',
+        'Price Date':     'price_date'
+    })
+
+    # Fix state name inconsistencies
+    df['state'] = df['state'].str.strip().str.lower()\
+        .map(lambda x: STATE_FIX.get(x, x.title()))
+
+    # Clean strings
+    df['district']  = df['district'].str.strip().str.title()
+    df['market']    = df['market'].str.strip()
+    df['commodity'] = df['commodity'].str.strip()
+
+    # Parse dates and prices
+    df['price_date']  = pd.to_datetime(df['price_date'],
+                                        dayfirst=False,
+                                        errors='coerce')
+    for col in ['modal_price', 'min_price', 'max_price']:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    # Drop bad rows
+    df = df.dropna(subset=['price_date', 'modal_price'])
+    return df[df['modal_price'] > 0]
+
+
+def _link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def ingest(path, version=None):
+    """
+    Publish a new version = `version` (default: current) plus the
+    price rows in the CSV at `path`. Returns the new version id,
+    or None when the batch adds nothing.
+    """
+    t0 = time.perf_counter()
+    parent, parent_dir = resolve(version)
+    print(f"📥 Ingesting {path} on top of {parent}...")
+
+    batch = clean_prices(pd.read_csv(path))[SERVING_COLUMNS]
+    if batch.empty:
+        print("   Nothing new — the batch has no usable rows.")
+        return None
+
+    # Patch the parent's snapshot only if it was built the same way;
+    # then only the touched series' rows are needed from the history
+    parent_manifest = read_manifest(parent_dir) or {}
+    snapshot_path = f'{parent_dir}/serving_snapshot.parquet'
+    patch = (os.path.exists(snapshot_path) and
+             parent_manifest.get('snapshot_version') == SNAPSHOT_VERSION)
+    history = read_history(parent_dir,
+                           filters=touched_filter(batch) if patch else None)
+
+    # Skip rows the history already has (and repeats within the batch)
+    batch = batch.drop_duplicates(subset=ROW_KEY)
+    seen  = pd.MultiIndex.from_frame(history[ROW_KEY])
+    batch = batch[~pd.MultiIndex.from_frame(batch[ROW_KEY]).isin(seen)]
+    if batch.empty:
+        print("   Nothing new — history already has every row.")
+        return None
+
+    df = pd.concat([history, batch], ignore_index=True)
+    if patch:
+        snapshot = update_snapshot(pd.read_parquet(snapshot_path), df, batch)
+    else:
+        snapshot = build_snapshot(df)
+
+    version, model_dir = new_version()
+    carried = MODEL_FILES + [os.path.basename(f)
+                             for f in history_files(parent_dir)]
+    for name in carried:
+        if os.path.exists(f'{parent_dir}/{name}'):
+            _link_or_copy(f'{parent_dir}/{name}', f'{model_dir}/{name}')
+    batch.to_parquet(f"{model_dir}/{HISTORY_PARTS.replace('*', version)}",
+                     index=False)
+    snapshot.to_parquet(f'{model_dir}/serving_snapshot.parquet', index=False)
+    markets = build_markets(pd.concat(
+        [load_markets(parent_dir), batch[MARKET_COLUMNS]], ignore_index=True))
+    markets.to_parquet(f'{model_dir}/{MARKETS_FILE}', index=False)
+    write_crosswalk(model_dir, markets)
+
+    write_manifest(
+        model_dir, version, joblib.load(f'{model_dir}/features.joblib'),
+        known    = {name: meta for name, meta in
+                    parent_manifest.get('files', {}).items()
+                    if name in carried},
+        metrics  = parent_manifest.get('metrics'),
+        snapshot_version = SNAPSHOT_VERSION,
+        parent   = parent,
+        ingested = {'file':    os.path.basename(path),
+                    'rows':    len(batch),
+                    'through': str(batch['price_date'].max().date())})
+    set_current(version)
+
+    print(f"   ✅ {len(batch):,} new rows, "
+          f"{snapshot.shape[0]:,} series in snapshot")
+    print(f"   ✅ model/current → {version} "
+          f"({time.perf_counter() - t0:.2f}s)")
+    return version
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    table_year = None
+    if '--table' in args:
+        i = args.index('--table')
+        del args[i]
+        table_year = datetime.date.today().year
+        if i < len(args) and args[i].isdigit():
+            table_year = int(args.pop(i))
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+    version = ingest(args[0])
+    if version is not None and table_year is not None:
+        from recommendation_table import build_table
+        build_table(table_year, version)
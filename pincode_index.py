@@ -0,0 +1,166 @@
+"""
+pincode_index.py
+================
+Compact pincode → (district, state) index.
+Used by data_store.py (build / persist), recommender.py,
+sms/sms_handler.py and app.py (through data_store.pincode_index()).
+
+Indian pincodes are six digits from 100000 to 999999, so a
+lookup is one array read: slots[pincode - 100000] is a row of a
+small table of distinct (district, state) pairs, or -1. The
+whole index is a 1.8 MB int16 array plus ~600 name pairs, saved
+as one .npz (no pickle) that loads in a few milliseconds.
+
+Names are kept as in the pincode CSV (stripped; states are upper
+case there) — callers title-case as they need. With `ids` (one
+district id per pair, see districts.py) lookup_id() gives the
+district id of a pincode in the same one array read.
+
+Usage:
+    from pincode_index import PincodeIndex
+    index = PincodeIndex.from_frame(data_store.pincodes())
+    index.lookup('641001')        # ('Coimbatore', 'TAMIL NADU')
+    index.lookup_id('641001')     # centroid row of Coimbatore
+    index.save('datasets/pincode_index.npz')
+"""
+
+import numpy as np
+
+FIRST_PINCODE = 100000
+LAST_PINCODE  = 999999
+
+
+def pincode_number(pincode):
+    """int of a 6-digit pincode (str or int), or None if not one."""
+    text = str(pincode).strip()
+    if len(text) != 6 or not (text.isascii() and text.isdigit()):
+        return None
+    number = int(text)
+    return number if number >= FIRST_PINCODE else None
+
+
+class PincodeIndex:
+    """Dense pincode → (district, state) lookup over interned pairs."""
+
+    def __init__(self, slots, districts, states, ids=None):
+        self.slots     = slots               # int16, -1 = unknown
+        self.slots.flags.writeable = False
+        self.districts = [str(d) for d in districts]
+        self.states    = [str(s) for s in states]
+        self.ids       = ids                 # district id per pair, or None
+
+    @classmethod
+    def from_frame(cls, df):
+        """Build from a pincode table (pincode, Districtname, statename)."""
+        slots = np.full(LAST_PINCODE - FIRST_PINCODE + 1, -1, dtype=np.int16)
+        pairs = {}
+        for pin, district, state in zip(df['pincode'], df['Districtname'],
+                                        df['statename']):
+            number = pincode_number(pin)
+            if number is None or not isinstance(district, str) \
+                    or not district or not isinstance(state, str):
+                continue
+            row = pairs.setdefault((district, state), len(pairs))
+            if slots[number - FIRST_PINCODE] < 0:   # first row wins
+                slots[number - FIRST_PINCODE] = row
+        districts = [d for d, _ in pairs]
+        states    = [s for _, s in pairs]
+        return cls(slots, districts, states)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as f:
+            return cls(f['slots'], f['districts'], f['states'])
+
+    def save(self, path):
+        """Write the index to `path` (.npz)."""
+        np.savez(path, slots=self.slots,
+                 districts=np.array(self.districts, dtype=str),
+                 states=np.array(self.states, dtype=str))
+
+    def __len__(self):
+        return int((self.slots >= 0).sum())
+
+    def with_ids(self, district_ids):
+        """The same index with a district id per pair (a DistrictIds)."""
+        return PincodeIndex(self.slots, self.districts, self.states,
+                            district_ids.ids(self.districts, self.states))
+
+    @property
+    def nbytes(self):
+        return self.slots.nbytes + sum(
+            len(s) for s in self.districts + self.states) + (
+            0 if self.ids is None else self.ids.nbytes)
+
+    def _row(self, pincode):
+        """Pair row of a pincode, or -1."""
+        number = pincode_number(pincode)
+        if number is None:
+            return -1
+        return self.slots[number - FIRST_PINCODE]
+
+    def lookup(self, pincode):
+        """(district, state) of a pincode, or None if unknown."""
+        row = self._row(pincode)
+        if row < 0:
+            return None
+        return self.districts[row], self.states[row]
+
+    def lookup_id(self, pincode):
+        """District id of a pincode (-1: no centroid), or None if unknown."""
+        row = self._row(pincode)
+        if row < 0:
+            return None
+        return int(self.ids[row])
+
+    def state_districts(self):
+        """{state: sorted distinct districts} over every pincode."""
+        mapping = {}
+        for district, state in zip(self.districts, self.states):
+            mapping.setdefault(state, set()).add(district)
+        return {s: sorted(d) for s, d in mapping.items()}
+
+
+# ── Quick test: parity with the CSV + load / lookup timing ─
+if __name__ == '__main__':
+    import os
+    import time
+
+    import data_store
+
+    t0 = time.perf_counter()
+    df = data_store._load_pincodes()
+    csv_s = time.perf_counter() - t0
+    index = PincodeIndex.from_frame(df)
+    path = data_store.PINCODE_NPZ + '.test.npz'
+    index.save(path)
+    t0 = time.perf_counter()
+    loaded = PincodeIndex.load(path)
+    npz_s = time.perf_counter() - t0
+    size = os.path.getsize(path)
+    os.remove(path)
+
+    # Every CSV row, plus pincodes that aren't there or aren't pincodes
+    expected = {p: (d, s) for p, d, s in zip(df['pincode'], df['Districtname'],
+                                             df['statename'])}
+    same = all(loaded.lookup(p) == v for p, v in expected.items())
+    missing = ['999999', '000000', '12345', '1234567', 'abcdef', ' 641001 ',
+               '６４１００１', 641001]
+    for p in missing:
+        want = expected.get(str(p).strip())
+        same &= loaded.lookup(p) == want
+    print(f"✅ {len(loaded):,} pincodes, {len(loaded.districts)} (district, state)"
+          f" pairs — same as the CSV: {same}")
+    print(f"📦 Load: CSV {1000 * csv_s:.0f} ms, .npz {1000 * npz_s:.1f} ms "
+          f"({size / 1e6:.1f} MB on disk, {loaded.nbytes / 1e6:.1f} MB in memory)")
+
+    pins = list(expected)[:5000]
+    t0 = time.perf_counter()
+    for p in pins:
+        loaded.lookup(p)
+    index_us = (time.perf_counter() - t0) / len(pins) * 1e6
+    t0 = time.perf_counter()
+    for p in pins[:200]:
+        df[df['pincode'] == p]
+    scan_us = (time.perf_counter() - t0) / 200 * 1e6
+    print(f"⏱  Lookup: index {index_us:.1f} µs, column scan {scan_us:,.0f} µs")
@@ -8,19 +8,184 @@ Usage:
     from predict import predict_price
     price = predict_price('Salem', 'Tomato', 'Tamil Nadu', 6, 2025)
     print(f"Predicted: ₹{price}/quintal")
+
+    # Many queries, one model call
+    from predict import predict_price_many
+    prices = predict_price_many([
+        ('Salem',  'Tomato', 'Tamil Nadu',  6, 2025),
+        ('Nashik', 'Onion',  'Maharashtra', 6, 2025, 'Lasalgaon'),
+    ])
+
+    # Which month to sell in — all 12 months, one model call
+    from predict import predict_price_curve
+    curve = predict_price_curve('Salem', 'Tomato', 'Tamil Nadu', 2025)
 """
 
+import time
+_IMPORT_T0 = time.perf_counter()
+
+import os
+import threading
+from types import SimpleNamespace
 import pandas as pd
 import numpy as np
 import joblib
+import artifacts
+import data_store
+from districts import UNKNOWN as UNKNOWN_DISTRICT
+from history import HISTORY_FEATURES
+from prediction_cache import PredictionCache
+from tree_eval import TREES_FILE, load_trees
+
+# ── Artifacts — loaded lazily on first use (or by warmup()) ──────────────
+# Importing this module is cheap; the model, encoders and lag tables are
+# loaded once per process by _get_artifacts(), which is thread-safe.
+# The active bundle can be replaced by reload() — every prediction reads
+# _artifacts once, so a swap never mixes two versions in one call.
+# Both writers of _artifacts (the first load and reload()) hold _reload_lock,
+# so a slow first load can never overwrite a version swapped in meanwhile.
+_artifacts   = None
+_reload_lock = threading.Lock()
+
+
+def _load_artifacts(version=None):
+    """Load model, encoders, features and lag tables of a version."""
+    t0 = time.perf_counter()
+    version, model_dir = artifacts.resolve(version)
+    print(f"📦 Loading model artifacts ({version})...")
+    artifacts.verify(model_dir)
+    encoders = joblib.load(f'{model_dir}/encoders.joblib')
+
+    # Lag / rolling features per (commodity, market|district|state)
+    lags, meta = data_store.lag_tables(model_dir)
+    lag_index = {}
+    for i, (level, commodity, key) in enumerate(meta['keys']):
+        lag_index.setdefault(level, {})[(commodity, key)] = i
+
+    # NumPy tree evaluator when the version has it (no xgboost
+    # import, same floats); older versions fall back to the pickle.
+    # Large batches go to the booster instead — see _batch_model
+    trees_path = f'{model_dir}/{TREES_FILE}'
+    if os.path.exists(trees_path):
+        model = load_trees(trees_path)
+    else:
+        model = joblib.load(f'{model_dir}/price_model.joblib')
+
+    a = SimpleNamespace(
+        version     = version,
+        model_dir   = model_dir,
+        model       = model,
+        booster     = None,             # loaded by _batch_model
+        features    = joblib.load(f'{model_dir}/features.joblib'),
+        lag_values  = lags['lag_values'],
+        lag_rows    = lags['lag_rows'],
+        lag_last    = lags['lag_last'],
+        lag_index   = lag_index,
+        parquet_max = lags['lag_last'].max(),
+        # LabelEncoder vocabularies compiled to plain lookups — classes_
+        # is sorted and unique, so a class's position is its code
+        vocab       = {col: {str(c): i for i, c in enumerate(le.classes_)}
+                       for col, le in encoders.items()},
+        vocab_index = {col: pd.Index(le.classes_.astype(str))
+                       for col, le in encoders.items()},
+    )
+    a.lag_keys = meta['keys']
+    a.booster_lock = threading.Lock()
+    a.district_keys, a.parquet_districts = _district_keys(a)
+    _build_tiers(a)
+    a.load_seconds = time.perf_counter() - t0
+    print(f"   ✅ Model loaded in {a.load_seconds:.2f}s.")
+    return a
+
+
+def _get_artifacts():
+    """Loaded artifacts — the first caller loads them, others wait."""
+    global _artifacts
+    if _artifacts is None:
+        with _reload_lock:
+            if _artifacts is None:
+                _artifacts = _load_artifacts()
+    return _artifacts
+
+
+def warmup(background=False):
+    """
+    Load artifacts now rather than on the first prediction.
+    With background=True the load runs in a daemon thread
+    (returned) so the caller can finish starting up; a
+    prediction arriving meanwhile waits for it to finish.
+    """
+    if not background:
+        _get_artifacts()
+        return None
+    thread = threading.Thread(target=_get_artifacts,
+                              name='predict-warmup', daemon=True)
+    thread.start()
+    return thread
+
+
+def is_ready():
+    """True once artifacts are loaded."""
+    return _artifacts is not None
 
-# ── Load artifacts at module import — guaranteed ready before first request ───
-print("📦 Loading model artifacts...")
-_model    = joblib.load('model/price_model.joblib')
-_encoders = joblib.load('model/encoders.joblib')
-_features = joblib.load('model/features.joblib')
-_df       = pd.read_parquet('model/clean_df.parquet')
-print("   ✅ Model loaded.")
+
+def active_version():
+    """Version id of the artifacts serving predictions."""
+    return _get_artifacts().version
+
+
+def active_model_dir():
+    """Directory of the artifacts serving predictions."""
+    return _get_artifacts().model_dir
+
+
+def reload(version=None, background=False):
+    """
+    Load a model version (default: whatever model/current points
+    at) and swap it in atomically. Requests keep being served by
+    the old version until the new one is fully loaded; if loading
+    fails the old version stays active. Returns the active version
+    id, or the loader thread when background=True.
+    """
+    if background:
+        thread = threading.Thread(target=reload, args=(version,),
+                                  name='predict-reload', daemon=True)
+        thread.start()
+        return thread
+
+    global _artifacts
+    with _reload_lock:
+        target = version or artifacts.current_version()
+        if _artifacts is not None and _artifacts.version == target:
+            return target
+        try:
+            fresh = _load_artifacts(target)
+        except Exception as e:
+            if _artifacts is None:
+                raise
+            print(f"   ⚠️  Reload of {target} failed, keeping "
+                  f"{_artifacts.version}: {e}")
+            return _artifacts.version
+        _artifacts = fresh
+        return fresh.version
+
+
+def watch_for_updates(interval=300):
+    """
+    Poll model/current every `interval` seconds in a daemon thread
+    and hot-swap when it points at a new version.
+    """
+    def _watch():
+        while True:
+            time.sleep(interval)
+            if (_artifacts is not None and
+                    artifacts.current_version() != _artifacts.version):
+                reload()
+
+    thread = threading.Thread(target=_watch, name='predict-watch',
+                              daemon=True)
+    thread.start()
+    return thread
 
 
 # ── Helpers ───────────────────────────────────────────────
@@ -39,134 +204,359 @@ HARVEST_MONTHS = {
     'Rice':   [10, 11, 12]
 }
 
-# ── District name aliases — maps external spellings to parquet spellings ─────
+# ── District keys — any spelling → the price data's spelling ────────────
 # The parquet (clean_df.parquet) uses the spellings from Agriculture_price_dataset.csv
 # which may differ from centroid CSV / pincode CSV / government reports.
-# Add entries here whenever a district lookup returns None unexpectedly.
-_DISTRICT_ALIASES = {
-    # Tamil Nadu
-    "tiruchchirappalli":   "Thiruchirappalli",   # centroid → parquet
-    "tiruchirappalli":     "Thiruchirappalli",
-    "tiruchirapalli":      "Thiruchirappalli",
-    "trichy":              "Thiruchirappalli",
-    "tirunelveli kattabo": "Tirunelveli",
-    "thiruvallur":         "Tiruvallur",
-    "thiruvarur":          "Thiruvarur",
-    "nilgiris":            "The Nilgiris",
-    "the nilgiris":        "The Nilgiris",
-    "thoothukudi":         "Tuticorin",
-    "kanniyakumari":       "Kanyakumari",
-    "tirupur":             "Tiruppur",
-    "kancheepuram":        "Kancheepuram",
-    # Karnataka
-    "bangalore urban":     "Bangalore",
-    "bangalore rural":     "Bangalore",
-    "dakshin kannad":      "Dakshina Kannada",
-    "davanagere":          "Davangere",
-    "uttar kannand":       "Uttara Kannada",
-    # Gujarat
-    "ahmadabad":           "Ahmedabad",
-    "banas kantha":        "Banaskantha",
-    "sabar kantha":        "Sabarkantha",
-    # Odisha
-    "bolangir":            "Balangir",
-    "baleshwar":           "Baleswar",
-    "baragarh":            "Bargarh",
-    "deogarh":             "Debagarh",
-    "jagatsinghpur":       "Jagatsinghapur",
-    "jajpur":              "Jajapur",
-    "keonjhar":            "Kendujhar",
-    "khordha":             "Khorda",
-    "nabarangpur":         "Nabarangapur",
-    "sonepur":             "Sonapur",
-    "sundargarh":          "Sundergarh",
-    # Bihar
-    "purba champaran":     "East Champaran",
-    "pashchim champaran":  "West Champaran",
-    "palamu":              "Palamau",
-    # Rajasthan
-    "chittaurgarh":        "Chittorgarh",
-    "dhaulpur":            "Dholpur",
-    "jhunjhunun":          "Jhujhunu",
-    # UP
-    "bara banki":          "Barabanki",
-    "baghpat":             "Bagpat",
-    "rae bareli":          "Raebareli",
-    # Uttarakhand
-    "dehra dun":           "Dehradun",
-    "naini tal":           "Nainital",
-    "rudra prayag":        "Rudraprayag",
-    # West Bengal
-    "barddhaman":          "Bardhaman",
-    "haora":               "Howrah",
-    "maldah":              "Malda",
-    "uttar dinajpur":      "North Dinajpur",
-    "dakshin dinajpur":    "South Dinajpur",
-}
+# Both sides are joined on district ids (districts.py); add aliases there
+# whenever the crosswalk reports a district unresolved.
+def _district_keys(a):
+    """
+    Parquet district spelling per district id, from the version's
+    crosswalk — an exactly matching spelling first.
+    """
+    crosswalk = data_store.district_crosswalk(a.model_dir)
+    rows = crosswalk[(crosswalk['source'] == 'parquet') &
+                     (crosswalk['district_id'] != UNKNOWN_DISTRICT)]
+    rows = rows.sort_values('match', key=lambda m: m != 'exact',
+                            kind='stable')
+    keys = {}
+    for district_id, district in zip(rows['district_id'], rows['district']):
+        keys.setdefault(int(district_id), district)
+    return keys, set(crosswalk.loc[crosswalk['source'] == 'parquet',
+                                   'district'])
+
 
+def _normalize_district(a, district, state):
+    """Parquet/training spelling of a centroid/pincode-CSV district."""
+    name = district.strip().title()
+    if name in a.parquet_districts:
+        return name
+    district_id = data_store.district_ids().id(district, state)
+    return a.district_keys.get(district_id, name)
 
-def _normalize_district(district: str) -> str:
-    """Map centroid/pincode-CSV spellings back to parquet/training spellings."""
-    key = district.strip().lower()
-    return _DISTRICT_ALIASES.get(key, district.strip().title())
 
+# Code used for values the encoders never saw in training
+UNSEEN_CODE = 0
 
-def _safe_encode(col, value):
-    """Encode a value — returns 0 if unseen."""
-    try:
-        return int(_encoders[col].transform([str(value)])[0])
-    except ValueError:
-        return 0
 
+def _safe_encode(a, col, value):
+    """Encode a value — returns UNSEEN_CODE if unseen."""
+    return a.vocab[col].get(str(value), UNSEEN_CODE)
 
-def _get_recent_prices(commodity, market, district, state,
-                       target_month=None, target_year=None):
+
+# History fallback order and minimum rows (district / state: days)
+_FALLBACK_TIERS = [('market', 7), ('district', 14), ('state', 30)]
+
+
+def _lookup_history(a, commodity, market, district, state):
     """
-    Get last 90 rows of prices for this commodity + market combo.
+    Find the snapshot row holding the lag features for this
+    commodity + market combo (last 90 rows of prices).
     Applies district name normalisation before querying.
     Fallback thresholds:
       - market  : >= 7 rows
-      - district: >= 14 rows  (avoid noisy single-market districts)
-      - state   : >= 30 rows  (wide pool; only use if well-represented)
+      - district: >= 14 days  (avoid noisy single-market districts)
+      - state   : >= 30 days  (wide pool; only use if well-represented)
+    District / state series are daily medians across their markets
+    (history.daily_aggregate), built once with the snapshot.
     Staleness guard: a market/district is stale if its latest price is
     more than 180 days before the parquet's own global max date.
     This rejects markets that stopped reporting long before the dataset ends.
+
+    Returns the snapshot row index, or None if nothing usable.
+    """
+    keys = {'market':   market,
+            'district': _normalize_district(a, district, state),
+            'state':    state}
+
+    for level, min_rows in _FALLBACK_TIERS:
+        i = a.lag_index.get(level, {}).get((commodity, keys[level]))
+        if i is None or a.lag_rows[i] < min_rows:
+            continue
+        if a.parquet_max - a.lag_last[i] <= 180:
+            return i
+
+    # Nothing usable — caller returns None
+    return None
+
+
+# ── Resolution tiers ──────────────────────────────────────
+# Which history tier a market resolves to depends only on the
+# data, never on the query month / year — so it is decided once
+# per version at load time for every market in the price history.
+TIER_COLUMNS = ['commodity', 'market', 'district', 'state',
+                'tier', 'key', 'row', 'serviceable']
+
+
+def _build_tiers(a):
+    """
+    Resolve every known (commodity, market, district, state) with
+    _lookup_history and store a.tiers (the table) and a.resolved
+    ({series: snapshot row or None}) on the artifacts bundle.
+    """
+    commodities = sorted({c for c, _ in a.lag_index.get('market', {})})
+    rows = []
+    for commodity in commodities:
+        table = data_store.markets(a.model_dir, commodity)
+        for market, district, state in table.itertuples(index=False,
+                                                         name=None):
+            if not all(isinstance(v, str)
+                       for v in (market, district, state)):
+                continue   # left to the per-query lookup
+            i = _lookup_history(a, commodity, market, district, state)
+            level, _, key = a.lag_keys[i] if i is not None \
+                else (None, None, None)
+            rows.append((commodity, market, district, state,
+                         level, key, -1 if i is None else i,
+                         i is not None))
+    a.tiers = pd.DataFrame(rows, columns=TIER_COLUMNS)
+    a.resolved = {
+        s: (None if r < 0 else r)
+        for s, r in zip(a.tiers[['commodity', 'market', 'district',
+                                 'state']].itertuples(index=False,
+                                                      name=None),
+                        a.tiers['row'])
+    }
+
+
+def resolution_table(commodity=None):
+    """
+    Resolved history tier per (commodity, market, district, state)
+    of the active version — for diagnostics. Columns: tier is
+    'market' / 'district' / 'state' or None, key is the snapshot
+    key used, serviceable is False for markets that can never
+    produce a price.
+    """
+    tiers = _get_artifacts().tiers
+    if commodity is not None:
+        tiers = tiers[tiers['commodity'] == commodity]
+    return tiers.reset_index(drop=True)
+
+
+def serviceable_markets(commodity):
+    """
+    Distinct (market, district, state) rows for a commodity,
+    in data_store.markets() order, without the markets that
+    can never produce a price.
+    """
+    a = _get_artifacts()
+    markets = data_store.markets(a.model_dir, commodity)
+    ok = [a.resolved.get((commodity, *m)) is not None
+          for m in markets.itertuples(index=False, name=None)]
+    return markets[ok].reset_index(drop=True)
+
+
+# ── Feature construction ─────────────────────────────────
+_QUERY_FIELDS = ['district', 'commodity', 'state',
+                 'target_month', 'target_year', 'market']
+
+
+def _encode_column(a, col, values):
+    """Vectorized _safe_encode over a whole column."""
+    codes = a.vocab_index[col].get_indexer(
+        np.asarray(values, dtype=str))
+    codes[codes < 0] = UNSEEN_CODE
+    return codes
+
+
+def _as_query_frame(queries):
+    """
+    Accepts a DataFrame, a list of dicts (predict_price keyword
+    arguments) or a list of tuples (predict_price positional order)
+    and returns a DataFrame with one column per _QUERY_FIELDS entry.
+    """
+    if isinstance(queries, pd.DataFrame):
+        q = queries.reset_index(drop=True)
+    else:
+        queries = list(queries)
+        if queries and isinstance(queries[0], dict):
+            q = pd.DataFrame(queries)
+        else:
+            q = pd.DataFrame(
+                [tuple(x) + (None,) * (6 - len(x)) for x in queries],
+                columns=_QUERY_FIELDS)
+    if 'market' not in q.columns:
+        q = q.assign(market=None)
+    # Use district name as market if not given
+    q = q.assign(market=q['market'].where(q['market'].notna(),
+                                          q['district']))
+    return q[_QUERY_FIELDS]
+
+
+# ── Batch prediction function ─────────────────────────────
+_UNRESOLVED = object()
+
+# Predictions are deterministic per (version, query) — see
+# prediction_cache.py; sizes can be tuned per deployment
+_cache = PredictionCache(
+    maxsize=int(os.environ.get('PREDICTION_CACHE_SIZE', '100000')),
+    ttl=float(os.environ.get('PREDICTION_CACHE_TTL', str(6 * 3600))))
+
+
+def cache_stats():
+    """Hit / miss counters and size of the prediction cache."""
+    return _cache.stats()
+
+
+def predict_price_many(queries):
+    """
+    Predict modal prices for many queries with a single
+    model call. Queries already answered by this model version
+    come from the prediction cache (see cache_stats()).
+
+    Parameters
+    ----------
+    queries : DataFrame or list of dicts / tuples with the
+              predict_price arguments (district, commodity,
+              state, target_month, target_year, market).
+              market is optional and defaults to district.
+
+    Returns
+    -------
+    np.ndarray (dtype=object), aligned with queries:
+    float predicted price in ₹/quintal, or None where
+    prediction is not possible.
     """
-    district = _normalize_district(district)
-    _parquet_max = _df['price_date'].max()
-
-    def _fresh_enough(hist):
-        if len(hist) == 0:
-            return False
-        latest = hist['price_date'].max()
-        return (_parquet_max - latest).days <= 180
-
-    # 1. Exact market match
-    hist = _df[
-        (_df['commodity'] == commodity) &
-        (_df['market']    == market)
-    ].sort_values('price_date').tail(90)
-    if len(hist) >= 7 and _fresh_enough(hist):
-        return hist
-
-    # 2. District-level fallback
-    hist = _df[
-        (_df['commodity'] == commodity) &
-        (_df['district']  == district)
-    ].sort_values('price_date').tail(90)
-    if len(hist) >= 14 and _fresh_enough(hist):
-        return hist
-
-    # 3. State-level fallback — only if enough data to be meaningful
-    hist = _df[
-        (_df['commodity'] == commodity) &
-        (_df['state']     == state)
-    ].sort_values('price_date').tail(90)
-    if len(hist) >= 30 and _fresh_enough(hist):
-        return hist
-
-    # Nothing usable — return empty so caller returns None
-    return _df.iloc[0:0]
+    q = _as_query_frame(queries)
+    out = np.full(len(q), None, dtype=object)
+    if len(q) == 0:
+        return out
+    a = _get_artifacts()
+
+    # Serve what the cache has; score only the rest
+    keys  = [(a.version, *k) for k in q.itertuples(index=False, name=None)]
+    found = _cache.get_many(keys)
+    miss  = np.array([k not in found for k in keys], dtype=bool)
+    out[~miss] = [found[k] for k, m in zip(keys, miss) if not m]
+    if miss.any():
+        fresh = _predict_queries(a, q[miss])
+        out[miss] = fresh
+        _cache.put_many(dict(zip([k for k, m in zip(keys, miss) if m],
+                                 fresh)))
+    return out
+
+
+# From about this many rows the XGBoost booster beats the NumPy
+# evaluator (python tree_eval.py times both); smaller batches
+# never pay for importing xgboost
+BOOSTER_MIN_ROWS = 150
+
+
+def _batch_model(a, n_rows):
+    """
+    Model to score n_rows with: the NumPy trees, or for a large
+    batch the XGBoost booster, loaded on first use. Both give
+    the same floats.
+    """
+    if n_rows < BOOSTER_MIN_ROWS or not hasattr(a.model, 'upper_bound'):
+        return a.model
+    if a.booster is None:
+        with a.booster_lock:
+            if a.booster is None:
+                a.booster = joblib.load(f'{a.model_dir}/price_model.joblib')
+    return a.booster
+
+
+def _predict_queries(a, q):
+    """predict_price_many without the cache, for a query frame."""
+    out = np.full(len(q), None, dtype=object)
+    X, usable = _feature_matrix(a, q)
+    if X is None:
+        return out
+    predictions = _batch_model(a, len(X)).predict(X)
+    out[np.flatnonzero(usable)] = [
+        round(max(float(p), 0), 2) for p in predictions]
+    return out
+
+
+def _feature_matrix(a, q):
+    """
+    Model features for the queries with usable history —
+    (X, usable mask), X None when no query has any.
+    """
+    # Recent history is looked up once per distinct series,
+    # however many months / years are asked for it.
+    series_cols = ['commodity', 'market', 'district', 'state']
+    series = q[series_cols].drop_duplicates()
+    lags = {}
+    for key in series.itertuples(index=False, name=None):
+        row = a.resolved.get(key, _UNRESOLVED)
+        if row is _UNRESOLVED:       # not in the tier table
+            row = _lookup_history(a, *key)
+        if row is not None:
+            lags[key] = row
+    keys = list(q[series_cols].itertuples(index=False, name=None))
+    usable = np.array([k in lags for k in keys], dtype=bool)
+    if not usable.any():
+        return None, usable
+
+    q    = q[usable]
+    keys = [k for k, ok in zip(keys, usable) if ok]
+    month = q['target_month'].to_numpy(dtype=np.int64)
+    year  = q['target_year'].to_numpy(dtype=np.int64)
+    commodity = q['commodity'].to_numpy(dtype=object)
+
+    # Build feature matrix column by column
+    cols = {
+        # Time features
+        'month':        month,
+        'year':         year,
+        'quarter':      (month - 1) // 3 + 1,
+        'week':         month * 4,
+        'day_of_year':  month * 30,
+        'season_enc':   _encode_column(
+                            a, 'season', [SEASON_MAP[m] for m in month]),
+        'is_harvest':   np.array([
+                            1 if m in HARVEST_MONTHS.get(c, []) else 0
+                            for c, m in zip(commodity, month)]),
+        # Location & commodity
+        'state_enc':     _encode_column(a, 'state',     q['state']),
+        'district_enc':  _encode_column(a, 'district',  q['district']),
+        'market_enc':    _encode_column(a, 'market',    q['market']),
+        'commodity_enc': _encode_column(a, 'commodity', commodity),
+    }
+    lag_matrix = a.lag_values[[lags[k] for k in keys]]
+    for i, name in enumerate(HISTORY_FEATURES):
+        cols[name] = lag_matrix[:, i]
+
+    return pd.DataFrame({f: cols[f] for f in a.features}), usable
+
+
+# Features a price bound leaves open: any target year
+_OPEN_FEATURES = ['year']
+
+
+def price_upper_bounds(queries):
+    """
+    Upper bound on predict_price for each query, whatever its
+    target_year — for pruning searches that only need the best
+    few prices (see recommender.recommend). Same queries as
+    predict_price_many; target_year is ignored.
+
+    Returns
+    -------
+    np.ndarray of float, aligned with queries: -inf where no
+    price can be predicted, inf when the active version has no
+    tree arrays to bound (pickled model only).
+    """
+    q = _as_query_frame(queries)
+    out = np.full(len(q), -np.inf)
+    if len(q) == 0:
+        return out
+    a = _get_artifacts()
+    X, usable = _feature_matrix(a, q.assign(target_year=0))
+    if X is None:
+        return out
+    if not hasattr(a.model, 'upper_bound'):
+        out[usable] = np.inf
+        return out
+    lo, hi = X.astype(np.float64), X.astype(np.float64)
+    for name in _OPEN_FEATURES:
+        if name in lo.columns:
+            lo[name], hi[name] = -np.inf, np.inf
+    # predictions are clipped at 0 and rounded to 0.01
+    out[usable] = np.maximum(a.model.upper_bound(lo, hi), 0) + 0.01
+    return out
 
 
 # ── Main prediction function ──────────────────────────────
@@ -176,6 +566,7 @@ def predict_price(district, commodity, state,
     """
     Predict modal price for a crop at a given
     market/district in a given month.
+    Thin wrapper around predict_price_many().
 
     Parameters
     ----------
@@ -191,72 +582,90 @@ def predict_price(district, commodity, state,
     float : predicted price in ₹/quintal
     None  : if prediction not possible
     """
-    # Use district name as market if not given
-    if market is None:
-        market = district
+    return predict_price_many([(
+        district, commodity, state,
+        target_month, target_year, market)])[0]
 
-    # Get recent price history for lag features
-    hist = _get_recent_prices(
-        commodity, market, district, state,
-        target_month=target_month, target_year=target_year)
 
-    if len(hist) == 0:
-        return None
+# ── Full-year price curve ─────────────────────────────────
+MONTHS = np.arange(1, 13)
+_SERIES_FIELDS = ['district', 'commodity', 'state', 'market']
 
-    prices = hist['modal_price']
 
-    # Build feature row
-    season = SEASON_MAP[target_month]
-    row = {
-        # Time features
-        'month':        target_month,
-        'year':         target_year,
-        'quarter':      (target_month - 1) // 3 + 1,
-        'week':         target_month * 4,
-        'day_of_year':  target_month * 30,
-        'season_enc':   _safe_encode('season', season),
-        'is_harvest':   1 if target_month in
-                        HARVEST_MONTHS.get(commodity, [])
-                        else 0,
-        # Location & commodity
-        'state_enc':     _safe_encode('state',     state),
-        'district_enc':  _safe_encode('district',  district),
-        'market_enc':    _safe_encode('market',    market),
-        'commodity_enc': _safe_encode('commodity', commodity),
-        # Lag features from recent history
-        'lag_7d':   prices.iloc[-7]  if len(prices) >= 7
-                    else prices.mean(),
-        'lag_14d':  prices.iloc[-14] if len(prices) >= 14
-                    else prices.mean(),
-        'lag_30d':  prices.iloc[-30] if len(prices) >= 30
-                    else prices.mean(),
-        'lag_60d':  prices.iloc[-60] if len(prices) >= 60
-                    else prices.mean(),
-        # Rolling averages
-        'roll_7d':   prices.tail(7).mean(),
-        'roll_30d':  prices.tail(30).mean(),
-        'roll_90d':  prices.mean(),
-        # Other signals
-        'momentum':   prices.iloc[-1] - (
-                        prices.iloc[-30]
-                        if len(prices) >= 30
-                        else prices.mean()),
-        'volatility': float(prices.std()) \
-                        if len(prices) > 1 else 0.0,
-        'price_range': float(
-            hist['max_price'].iloc[-1] -
-            hist['min_price'].iloc[-1]),
-        'min_price':  float(hist['min_price'].iloc[-1]),
-        'max_price':  float(hist['max_price'].iloc[-1]),
-    }
+def predict_price_curves(series, target_year):
+    """
+    Predict all 12 target months for many series with a single
+    model call — history is looked up once per series and only
+    the time features change from month to month.
+
+    Parameters
+    ----------
+    series      : DataFrame or list of dicts / tuples with
+                  (district, commodity, state, market);
+                  market is optional and defaults to district.
+    target_year : int  e.g. 2025
+
+    Returns
+    -------
+    np.ndarray (dtype=object), shape (len(series), 12):
+    column m-1 holds month m's price in ₹/quintal, or None
+    where prediction is not possible.
+    """
+    if isinstance(series, pd.DataFrame):
+        s = series.reset_index(drop=True)
+    else:
+        series = list(series)
+        if series and isinstance(series[0], dict):
+            s = pd.DataFrame(series)
+        else:
+            s = pd.DataFrame([tuple(x) + (None,) * (4 - len(x))
+                              for x in series], columns=_SERIES_FIELDS)
+    if 'market' not in s.columns:
+        s = s.assign(market=None)
 
-    X = pd.DataFrame([row])[_features]
-    prediction = float(_model.predict(X)[0])
-    return round(max(prediction, 0), 2)
+    n = len(s)
+    q = s.loc[s.index.repeat(len(MONTHS)), _SERIES_FIELDS]\
+         .assign(target_month=np.tile(MONTHS, n),
+                 target_year=target_year)
+    return predict_price_many(q).reshape(n, len(MONTHS))
+
+
+def predict_price_curve(district, commodity, state,
+                        target_year, market=None):
+    """
+    Predicted price for every month of target_year — answers
+    "which month should I sell in".
+
+    Parameters
+    ----------
+    district    : str  e.g. 'Salem'
+    commodity   : str  e.g. 'Tomato'
+    state       : str  e.g. 'Tamil Nadu'
+    target_year : int  e.g. 2025
+    market      : str, list of str, or None (defaults to district)
+
+    Returns
+    -------
+    dict {month: price or None} for one market, or
+    {market: {month: price or None}} when market is a list.
+    """
+    markets = market if isinstance(market, (list, tuple)) else [market]
+    curves = predict_price_curves(
+        [(district, commodity, state, m) for m in markets], target_year)
+    by_month = [dict(zip(MONTHS.tolist(), row)) for row in curves]
+    if isinstance(market, (list, tuple)):
+        return dict(zip(markets, by_month))
+    return by_month[0]
+
+
+# Import cost of this module (artifacts are not loaded yet)
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_T0
 
 
 # ── Quick test ────────────────────────────────────────────
 if __name__ == '__main__':
+    print(f"⏱  predict imported in {IMPORT_SECONDS:.2f}s")
+    warmup()
     test_cases = [
         ('Salem',       'Onion',  'Tamil Nadu',   6, 2025),
         ('Nashik',      'Onion',  'Maharashtra',  6, 2025),
@@ -280,3 +689,19 @@ if __name__ == '__main__':
         else:
             print(f"{district:<15} {crop:<8} "
                   f"No data available")
+
+    print("\n🧪 Testing predict_price_curve()\n")
+    curve = predict_price_curve('Salem', 'Onion', 'Tamil Nadu', 2025)
+    same  = all(curve[m] == predict_price('Salem', 'Onion', 'Tamil Nadu',
+                                          m, 2025) for m in curve)
+    print("Salem Onion 2025: " + ", ".join(
+        f"{m}: ₹{p:,.0f}" if p is not None else f"{m}: —"
+        for m, p in curve.items()))
+    print(f"Matches predict_price month by month: {same}")
+
+    print(f"\n📊 Prediction cache: {cache_stats()}")
+
+    print("\n🧪 Resolution tiers\n")
+    tiers = resolution_table()
+    print(tiers.groupby('commodity')['tier']
+               .value_counts(dropna=False).unstack(fill_value=0))
@@ -0,0 +1,87 @@
+"""
+prediction_cache.py
+===================
+Bounded in-memory cache for predicted prices.
+Used by predict.py (in front of predict_price_many) and
+recommender.py (priced candidate markets, before profit).
+
+Keys are plain tuples; predict.py puts the active model
+version first, so a hot-swap or an ingested batch never serves
+a price computed from older artifacts. Entries are evicted
+least-recently-used once the cache is full, and expire after
+`ttl` seconds whatever their use.
+
+Usage:
+    from prediction_cache import PredictionCache
+    cache = PredictionCache(maxsize=10_000, ttl=3600)
+    found = cache.get_many(keys)          # {key: value} for hits
+    cache.put_many({k: v for k, v in ...})
+    print(cache.stats())
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """Thread-safe LRU cache with a per-entry time-to-live."""
+
+    def __init__(self, maxsize=100_000, ttl=6 * 3600):
+        self.maxsize = maxsize
+        self.ttl     = ttl
+        self.hits    = 0
+        self.misses  = 0
+        self._data   = OrderedDict()       # key → (expires_at, value)
+        self._lock   = threading.Lock()
+
+    def get_many(self, keys):
+        """{key: value} for the keys present and not expired."""
+        now, found = time.monotonic(), {}
+        with self._lock:
+            for key in keys:
+                entry = self._data.get(key)
+                if entry is None:
+                    self.misses += 1
+                elif entry[0] < now:
+                    del self._data[key]
+                    self.misses += 1
+                else:
+                    self._data.move_to_end(key)
+                    found[key] = entry[1]
+                    self.hits += 1
+        return found
+
+    def put_many(self, items):
+        """Store {key: value}, evicting least-recently-used entries."""
+        if self.maxsize <= 0:
+            return
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for key, value in items.items():
+                self._data[key] = (expires, value)
+                self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get(self, key, default=None):
+        return self.get_many([key]).get(key, default)
+
+    def put(self, key, value):
+        self.put_many({key: value})
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        """Counters and size — hit_rate is over all lookups so far."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'size':     len(self._data),
+                    'maxsize':  self.maxsize,
+                    'ttl':      self.ttl,
+                    'hits':     self.hits,
+                    'misses':   self.misses,
+                    'hit_rate': self.hits / lookups if lookups else 0.0}
@@ -0,0 +1,375 @@
+"""
+recommendation_table.py
+=======================
+Precomputed recommend() answers for every question SMS and the
+web app can ask: each centroid district × crop × month × quantity
+bucket, at their fixed 200 km radius and top 3.
+Used by recommender.py (lookup before computing live).
+
+Run: python recommendation_table.py [target_year] [--workers N]
+                                    [--states "Tamil Nadu,Kerala"]
+     (default: this year, one worker per CPU, every state)
+
+A table belongs to one model version and one target year and is
+saved next to that version's artifacts:
+  recommendations_<year>.parquet  one row per (cell, rank)
+  recommendations_<year>.json     the grid it covers + build info
+A hot-swap or an ingested batch therefore never serves answers
+from older prices: the new version has no table until it is
+rebuilt, and recommend() computes live meanwhile. Run this after
+every ingest (python ingest.py <prices.csv> --table does) or the
+tables stop being used.
+
+The build loads the model version once, in the parent process;
+on Linux the pool workers are forked from it and share those
+pages copy-on-write instead of each loading its own copy.
+
+Cells are numbered origin-major, so finding one is arithmetic on
+the origin's district id (its centroid row, see districts.py) —
+no search:
+  cell = ((origin * n_crops + crop) * 12 + month - 1) * n_qty + qty
+
+Usage:
+    from recommendation_table import get_table
+    table = get_table(model_dir, 2025)        # None if not built
+    m, profit = table.lookup(district_id, 'Tomato', 6, 750, 200, 3)
+"""
+
+import contextlib
+import datetime
+import io
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+# The questions sms_handler.py / app.py ask
+CROPS      = ['Tomato', 'Onion', 'Potato', 'Wheat', 'Rice']
+MONTHS     = list(range(1, 13))
+QUANTITIES = [250, 750, 2500, 6000]      # QTY_MAP buckets, kg
+RADIUS_KM  = 200
+TOP_N      = 3
+
+# Per row: the cell, then the market; every other column is
+# one of recommender.PROFIT_COLUMNS
+MARKET_COLUMNS = ['cell', 'market', 'district', 'state',
+                  'distance_km', 'predicted_price']
+
+# Bumped when the stored figures change meaning; tables saved with
+# another format are ignored (2: profits rounded with np.round,
+# 3: rounded like round() again)
+TABLE_FORMAT = 3
+
+RECHECK_SECONDS = 60        # how often a missing table is looked for again
+
+
+def table_paths(model_dir, target_year):
+    """(parquet, json) paths of a version's table for a year."""
+    base = os.path.join(model_dir, f'recommendations_{target_year}')
+    return base + '.parquet', base + '.json'
+
+
+class RecommendationTable:
+    """One version's precomputed answers for one target year."""
+
+    def __init__(self, rows, meta, district_id):
+        self.meta        = meta
+        self.target_year = meta['target_year']
+        self.radius_km   = meta['radius_km']
+        self.top_n       = meta['top_n']
+        self._crop  = {c: i for i, c in enumerate(meta['crops'])}
+        self._qty   = {q: i for i, q in enumerate(meta['quantities'])}
+        self._per_origin = len(meta['crops']) * 12 * len(meta['quantities'])
+
+        self.done = np.zeros(meta['n_origins'], dtype=bool)
+        self.done[meta['origins']] = True
+
+        self.market   = rows['market'].to_numpy(dtype=object)
+        self.district = rows['district'].to_numpy(dtype=object)
+        self.state    = rows['state'].to_numpy(dtype=object)
+        self.district_id = district_id          # per row, from the crosswalk
+        self.distance = rows['distance_km'].to_numpy(dtype=np.float64)
+        self.prices   = rows['predicted_price'].to_numpy(dtype=np.float64)
+        self.profit   = {k: rows[k].to_numpy(dtype=np.float64)
+                         for k in rows.columns if k not in MARKET_COLUMNS}
+
+        # rows are sorted by cell; cell c owns rows start[c]:start[c+1]
+        n_cells = meta['n_origins'] * self._per_origin
+        self.start = np.searchsorted(rows['cell'].to_numpy(),
+                                     np.arange(n_cells + 1))
+
+    def __len__(self):
+        return int(self.done.sum()) * self._per_origin
+
+    def lookup(self, origin, commodity, target_month, quantity_kg,
+               max_distance_km, top_n):
+        """
+        (markets, profit) columns of the precomputed answer, best
+        first — or None when the question is outside the table.
+        """
+        crop = self._crop.get(commodity)
+        qty  = self._qty.get(quantity_kg)
+        if (crop is None or qty is None or
+                max_distance_km != self.radius_km or
+                not 0 < top_n <= self.top_n or
+                target_month not in MONTHS or
+                not 0 <= origin < len(self.done) or
+                not self.done[origin]):
+            return None
+
+        cell = ((origin * len(self._crop) + crop) * 12 +
+                target_month - 1) * len(self._qty) + qty
+        rows = slice(self.start[cell], min(self.start[cell + 1],
+                                           self.start[cell] + top_n))
+        m = SimpleNamespace(market=self.market[rows],
+                            district=self.district[rows],
+                            state=self.state[rows],
+                            district_id=self.district_id[rows],
+                            distance=self.distance[rows],
+                            prices=self.prices[rows])
+        return m, {k: v[rows] for k, v in self.profit.items()}
+
+
+def _district_ids(model_dir, rows):
+    """District id of each row's market, from the version's crosswalk."""
+    import data_store
+    from districts import UNKNOWN, id_map
+
+    ids = id_map(data_store.district_crosswalk(model_dir), 'parquet')
+    return np.array([ids.get(k, UNKNOWN)
+                     for k in zip(rows['district'], rows['state'])],
+                    dtype=np.int64)
+
+
+def load_table(model_dir, target_year):
+    """RecommendationTable saved for a version and year, or None."""
+    parquet_path, json_path = table_paths(model_dir, target_year)
+    try:
+        with open(json_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('format') != TABLE_FORMAT:
+            return None           # built by an older release — rebuild
+        rows = pd.read_parquet(parquet_path)
+    except FileNotFoundError:
+        return None
+    return RecommendationTable(rows, meta, _district_ids(model_dir, rows))
+
+
+# (model_dir, year) → (table or None, monotonic time loaded / looked for)
+_tables = {}
+_lock   = threading.Lock()
+
+
+def get_table(model_dir, target_year):
+    """
+    Cached load_table(). A missing table is looked for again
+    every RECHECK_SECONDS, so one built while the app runs is
+    picked up without a restart. Tables of other model
+    directories are dropped.
+    """
+    key = (model_dir, target_year)
+    entry = _tables.get(key)
+    if entry is not None and (entry[0] is not None or
+                              time.monotonic() - entry[1] < RECHECK_SECONDS):
+        return entry[0]
+    with _lock:
+        table = load_table(model_dir, target_year)
+        for old in [k for k in _tables if k[0] != model_dir]:
+            del _tables[old]
+        _tables[key] = (table, time.monotonic())
+    return table
+
+
+# ── Build ────────────────────────────────────────────────
+def _origins(states=None):
+    """
+    District ids recommend() can resolve a farmer to — the first
+    centroid row of each (district, state) — optionally only in
+    `states`.
+    """
+    import data_store
+
+    centroids = data_store.centroids()
+    ids       = data_store.district_ids()
+    wanted    = {s.lower() for s in states} if states else None
+    rows = []
+    for r, (d, s) in enumerate(zip(centroids['District'],
+                                   centroids['State'])):
+        if not isinstance(d, str):
+            continue
+        s = s if isinstance(s, str) else None
+        if wanted is not None and (s or '').lower() not in wanted:
+            continue
+        if ids.id(d, s) == r:
+            rows.append((r, d, s))
+    return rows, len(centroids)
+
+
+# Version the artifacts of this process were loaded for — forked
+# workers inherit it (and the artifacts) from the parent
+_loaded_version = None
+
+
+def _init_worker(version):
+    """Pool initializer: serve the version the table is built for."""
+    global _loaded_version
+    if _loaded_version != version:
+        import predict
+        predict.reload(version)
+        _loaded_version = version
+
+
+def _load_shared(version):
+    """
+    Everything recommend() reads, loaded in this process before
+    the pool forks, so workers inherit it rather than reload it.
+    """
+    import data_store
+
+    _init_worker(version)
+    data_store.final_data()
+    data_store.distance_matrix()
+
+
+def _pool_context():
+    """fork where the platform has it (workers share the parent's pages)."""
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return None
+
+
+def _build_origins(target_year, origins):
+    """Table rows (as column lists) for a chunk of origins."""
+    from recommender import PROFIT_COLUMNS, recommend_sweep
+
+    cols = {k: [] for k in MARKET_COLUMNS + PROFIT_COLUMNS}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for origin, district, state in origins:
+            cell = origin * len(CROPS) * 12 * len(QUANTITIES)
+            for crop in CROPS:
+                for month in MONTHS:
+                    sweep = recommend_sweep(crop, QUANTITIES,
+                                            district, state, month,
+                                            target_year, RADIUS_KM, TOP_N)
+                    for q in QUANTITIES:
+                        for r in sweep[q]:
+                            cols['cell'].append(cell)
+                            for k in cols:
+                                if k != 'cell':
+                                    cols[k].append(r[k])
+                        cell += 1
+    return cols
+
+
+def build_table(target_year, version=None, workers=None, states=None):
+    """
+    Precompute and save the table for `version` (default:
+    current) and `target_year`, spreading origins over a pool
+    of `workers` processes (default: one per CPU). Returns the
+    RecommendationTable.
+    """
+    from artifacts import resolve
+    from recommender import PROFIT_COLUMNS
+
+    t0 = time.perf_counter()
+    version, model_dir = resolve(version)
+    origins, n_origins = _origins(states)
+    workers = workers or os.cpu_count() or 1
+    print(f"🗂  Precomputing {len(origins):,} districts × {len(CROPS)} crops"
+          f" × 12 months × {len(QUANTITIES)} quantities for {target_year}"
+          f" ({version}, {workers} workers)...")
+
+    # Small chunks keep the workers evenly busy
+    chunks = [origins[i:i + 8] for i in range(0, len(origins), 8)]
+    _load_shared(version)
+    if workers == 1:
+        parts = [_build_origins(target_year, c) for c in chunks]
+    else:
+        with ProcessPoolExecutor(workers, mp_context=_pool_context(),
+                                 initializer=_init_worker,
+                                 initargs=(version,)) as pool:
+            parts = list(pool.map(_build_origins,
+                                  [target_year] * len(chunks), chunks))
+
+    rows = pd.DataFrame({k: [v for p in parts for v in p[k]]
+                         for k in MARKET_COLUMNS + PROFIT_COLUMNS})
+    rows = rows.astype({'cell': np.int64}).sort_values('cell', kind='stable')
+    meta = {
+        'version':     version,
+        'format':      TABLE_FORMAT,
+        'target_year': target_year,
+        'crops':       CROPS,
+        'quantities':  QUANTITIES,
+        'radius_km':   RADIUS_KM,
+        'top_n':       TOP_N,
+        'n_origins':   n_origins,
+        'origins':     [o[0] for o in origins],
+        'built_at':    datetime.datetime.now().isoformat(timespec='seconds'),
+        'seconds':     round(time.perf_counter() - t0, 1),
+    }
+
+    # The json makes a table visible: drop the old one, write the
+    # parquet, then the new json
+    parquet_path, json_path = table_paths(model_dir, target_year)
+    if os.path.exists(json_path):
+        os.remove(json_path)
+    rows.to_parquet(parquet_path + '.tmp', index=False)
+    os.replace(parquet_path + '.tmp', parquet_path)
+    with open(json_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(json_path + '.tmp', json_path)
+
+    n_cells = len(origins) * len(CROPS) * 12 * len(QUANTITIES)
+    print(f"   ✅ {n_cells:,} answers, {len(rows):,} rows, "
+          f"{os.path.getsize(parquet_path) / 1e6:.1f} MB → {parquet_path} "
+          f"({meta['seconds']:.0f}s)")
+    rows = rows.reset_index(drop=True)
+    return RecommendationTable(rows, meta, _district_ids(model_dir, rows))
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    workers = states = None
+    if '--workers' in args:
+        i = args.index('--workers')
+        workers = int(args[i + 1])
+        del args[i:i + 2]
+    if '--states' in args:
+        i = args.index('--states')
+        states = [s.strip() for s in args[i + 1].split(',')]
+        del args[i:i + 2]
+    year = int(args[0]) if args else datetime.date.today().year
+    table = build_table(year, workers=workers, states=states)
+
+    # Spot check: table answers vs computing live
+    import random
+    import predict
+    from recommender import recommend, recommend_sweep
+
+    rng = random.Random(0)
+    origins, _ = _origins(states)
+    sample = [(rng.choice(origins), rng.choice(CROPS), rng.choice(MONTHS),
+               rng.choice(QUANTITIES)) for _ in range(100)]
+    same, hit_s, live_s = 0, 0.0, 0.0
+    with contextlib.redirect_stdout(io.StringIO()):
+        predict.reload(table.meta['version'])
+        for (origin, district, state), crop, month, qty in sample:
+            t0 = time.perf_counter()
+            got = recommend(crop, qty, district, state, month, year,
+                            RADIUS_KM, TOP_N)
+            t1 = time.perf_counter()
+            live = recommend_sweep(crop, [qty], district, state, month,
+                                   year, RADIUS_KM, TOP_N)[qty]
+            t2 = time.perf_counter()
+            same += got == live
+            hit_s, live_s = hit_s + t1 - t0, live_s + t2 - t1
+    print(f"   ✅ Spot check: {same} / {len(sample)} answers match live, "
+          f"{1e3 * hit_s / len(sample):.2f} ms vs "
+          f"{1e3 * live_s / len(sample):.1f} ms per query")
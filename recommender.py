@@ -21,100 +21,256 @@ Usage:
 
     for r in results:
         print(r)
+
+    # Best markets as the load crosses the truck tiers
+    from recommender import recommend_sweep
+    by_qty = recommend_sweep('Tomato', [500, 1000, 1001, 5001],
+                             'Coimbatore', 'Tamil Nadu', 6, 2025)
+
+    # Profit breakdown for many prices / distances at once
+    from recommender import calc_profit_array
+    table = calc_profit_array(500, prices, distances)   # DataFrame
 """
 
+import os
+import threading
 import pandas as pd
 import numpy as np
 import joblib
-from predict import predict_price
-
-# ── Load supporting datasets once ────────────────────────
+from types import SimpleNamespace
+from predict import (predict_price_many, active_model_dir, active_version,
+                     price_upper_bounds, serviceable_markets)
+import data_store
+from geo import GridIndex
+from districts import UNKNOWN, id_map
+from recommendation_table import get_table
+from prediction_cache import PredictionCache
+
+# ── Supporting datasets — shared via data_store ──────────
 _centroids  = None
 _final_data = None
-_price_df   = None
+_districts  = None     # DistrictIds: any spelling → district id
+_distances  = None     # (n, n) road km between centroid rows
+_coords     = None     # (n, 2) latitude / longitude per centroid row
+_market_tables = {}    # (version, commodity) → markets + grid index
+
+# Reachable markets per (version, commodity, farmer's centroid
+# row, month, year, radius) — see _candidate_markets
+_candidates = PredictionCache(
+    maxsize=int(os.environ.get('CANDIDATE_CACHE_SIZE', '10000')),
+    ttl=float(os.environ.get('PREDICTION_CACHE_TTL', str(6 * 3600))))
 
 def _load_data():
-    global _centroids, _final_data, _price_df
+    global _centroids, _final_data, _districts, _distances, _coords
     if _centroids is None:
-        _centroids = pd.read_csv(
-    'datasets/district wise centroids.csv')
-        _centroids.columns = \
-            _centroids.columns.str.strip()
-        _centroids['District'] = \
-            _centroids['District'].str.strip().str.title()
-        _centroids['State'] = \
-            _centroids['State'].str.strip()
-
-        _final_data = pd.read_csv(
-            'datasets/final_data.csv')
-        _final_data['District'] = \
-            _final_data['District'].str.strip().str.title()
-        _final_data['State'] = \
-            _final_data['State'].str.strip()
-        _final_data['Market'] = \
-            _final_data['Market'].str.strip()
-
-        _price_df = pd.read_parquet(
-            'model/clean_df.parquet')
+        _final_data = data_store.final_data()
+        _districts  = data_store.district_ids()
+        _distances  = data_store.distance_matrix()
+        centroids   = data_store.centroids()
+        _coords     = np.column_stack([
+            centroids['Latitude'].to_numpy(dtype=np.float64),
+            centroids['Longitude'].to_numpy(dtype=np.float64)])
+        _centroids  = centroids                # last: marks loaded
 
 
 # ─────────────────────────────────────────────────────────
 # DISTANCE
 # ─────────────────────────────────────────────────────────
-def _haversine(lat1, lon1, lat2, lon2):
-    """Straight-line distance × 1.3 ≈ road distance."""
-    R = 6371
-    lat1, lon1, lat2, lon2 = map(
-        np.radians, [lat1, lon1, lat2, lon2])
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    a = (np.sin(dlat/2)**2 +
-         np.cos(lat1) * np.cos(lat2) *
-         np.sin(dlon/2)**2)
-    straight = R * 2 * np.arctan2(
-        np.sqrt(a), np.sqrt(1-a))
-    return round(straight * 1.3, 1)
+def _district_id(district, state=None):
+    """
+    District id — its centroid row — of any spelling of a
+    district (preferring the one in `state`), or None if unknown.
+    """
+    district_id = _districts.id(district, state)
+    return None if district_id == UNKNOWN else district_id
 
 
 def get_distance(origin_district, dest_district,
                  origin_state=None, dest_state=None):
     """
     Get approximate road distance (km) between
-    two districts using centroid coordinates.
+    two districts from the precomputed centroid
+    distance matrix (see data_store.distance_matrix).
     Returns 999 if district not found.
     """
     _load_data()
 
-    def get_coords(district, state=None):
-        mask = (_centroids['District'].str.lower()
-                == district.lower())
-        if state:
-            mask_s = (_centroids['State'].str.lower()
-                      == state.lower())
-            row = _centroids[mask & mask_s]
-            if row.empty:
-                row = _centroids[mask]
-        else:
-            row = _centroids[mask]
-        return row
-
-    orig = get_coords(origin_district, origin_state)
-    dest = get_coords(dest_district,   dest_state)
+    orig = _district_id(origin_district, origin_state)
+    dest = _district_id(dest_district,   dest_state)
 
-    if orig.empty or dest.empty:
+    if orig is None or dest is None:
         return 999  # unknown — will be filtered out
 
-    return _haversine(
-        orig['Latitude'].values[0],
-        orig['Longitude'].values[0],
-        dest['Latitude'].values[0],
-        dest['Longitude'].values[0]
+    return _distances[orig, dest]
+
+
+def _market_table(commodity):
+    """
+    Serviceable markets for a commodity as columns, with their
+    district ids from the version's crosswalk (centroid rows,
+    UNKNOWN = -1) and a GridIndex over the ones that have
+    coordinates. Built once per model version.
+
+    grid_pos maps a grid point to its market position; off_grid
+    lists the markets the grid can't place.
+    """
+    version = active_version()
+    key = (version, commodity)
+    t = _market_tables.get(key)
+    if t is not None:
+        return t
+
+    markets = serviceable_markets(commodity)
+    ids  = id_map(data_store.district_crosswalk(active_model_dir()),
+                  'parquet')
+    rows = np.array([ids.get(k, UNKNOWN)
+                     for k in zip(markets['district'], markets['state'])],
+                    dtype=np.int64)
+    placed = rows >= 0
+    placed[placed] = np.isfinite(_coords[rows[placed]]).all(axis=1)
+    grid_pos = np.flatnonzero(placed)
+    t = SimpleNamespace(
+        market   = markets['market'].to_numpy(dtype=object),
+        district = markets['district'].to_numpy(dtype=object),
+        state    = markets['state'].to_numpy(dtype=object),
+        rows     = rows,
+        grid     = GridIndex(_coords[rows[grid_pos], 0],
+                             _coords[rows[grid_pos], 1]),
+        grid_pos = grid_pos,
+        off_grid = np.flatnonzero(~placed),
+        bounds   = {},          # month → price bounds (_price_bounds)
     )
 
+    # Tables of older versions are never asked for again
+    for old in [k for k in _market_tables if k[0] != version]:
+        del _market_tables[old]
+    _market_tables[key] = t
+    return t
+
+
+def markets_within(lat, lon, radius_km, commodity):
+    """
+    Serviceable markets for a commodity whose district centroid
+    lies within radius_km road km of (lat, lon).
+
+    Parameters
+    ----------
+    lat, lon   : float  query point in degrees
+    radius_km  : float  road distance (straight line × 1.3)
+    commodity  : str    e.g. 'Tomato'
+
+    Returns
+    -------
+    DataFrame with market, district, state, distance_km
+    in data_store.markets() order
+    """
+    _load_data()
+    t = _market_table(commodity)
+    points, km = t.grid.within(lat, lon, radius_km)
+    pos = t.grid_pos[points]
+    return pd.DataFrame({'market':      t.market[pos],
+                         'district':    t.district[pos],
+                         'state':       t.state[pos],
+                         'distance_km': km})
+
+
+def candidate_cache_stats():
+    """Hit / miss counters and size of the candidate-market cache."""
+    return _candidates.stats()
+
 
 # ─────────────────────────────────────────────────────────
 # TRANSPORT COST
 # ─────────────────────────────────────────────────────────
+# Truck tiers: (largest load kg, ₹/km, loading ₹, minimum ₹)
+TRUCK_TIERS = [
+    (1000,   12, 200, 500),     # Mini
+    (5000,   18, 400, 800),     # Medium
+    (np.inf, 25, 600, 1200),    # Large
+]
+
+PROFIT_COLUMNS = ['gross_revenue', 'transport_cost', 'mandi_fee',
+                  'misc_costs', 'total_costs', 'net_profit',
+                  'profit_per_kg']
+
+
+def _round(values, decimals=2):
+    """
+    Python's round() per element of a float64 array.
+
+    np.round scales by 10**decimals and rounds the product, so
+    it can land one step off wherever the scaled value sits
+    close to .5 (33650.025 → .02, round() gives .03). Elsewhere
+    the two agree; those few elements are redone with round().
+    """
+    out    = np.round(values, decimals)
+    scaled = values * 10.0 ** decimals
+    near   = (np.abs(scaled - np.floor(scaled) - 0.5)
+              <= np.maximum(np.abs(scaled) * 1e-15, 1e-9))
+    fix = np.nonzero(near)
+    out[fix] = [round(float(v), decimals) for v in values[fix]]
+    return out
+
+
+def _transport_columns(distance_km, quantity_kg):
+    """Transport cost per element of broadcast distances and quantities."""
+    distance_km, quantity_kg = np.broadcast_arrays(
+        np.atleast_1d(np.asarray(distance_km, dtype=np.float64)),
+        np.atleast_1d(np.asarray(quantity_kg, dtype=np.float64)))
+    tier    = [quantity_kg <= limit for limit, *_ in TRUCK_TIERS]
+    rate    = np.select(tier, [t[1] for t in TRUCK_TIERS])
+    loading = np.select(tier, [t[2] for t in TRUCK_TIERS])
+    minimum = np.select(tier, [t[3] for t in TRUCK_TIERS])
+    return _round(np.maximum(distance_km * rate + loading, minimum))
+
+
+def _profit_columns(quantity_kg, price_per_quintal, distance_km):
+    """
+    calc_profit over broadcast arrays — {column: array}.
+
+    Every figure is rounded to the paisa exactly as Python's
+    round() does (see _round), for scalars and arrays alike —
+    the same figures the original scalar code gave.
+    """
+    quantity_kg, price, distance_km = np.broadcast_arrays(*(
+        np.atleast_1d(np.asarray(v, dtype=np.float64))
+        for v in (quantity_kg, price_per_quintal, distance_km)))
+    qty_quintals = quantity_kg / 100
+
+    gross_revenue  = _round(price * qty_quintals)
+    transport_cost = _transport_columns(distance_km, quantity_kg)
+    mandi_fee      = _round(gross_revenue * 0.02)
+    misc_costs     = _round(qty_quintals * 10)
+    total_costs    = _round(transport_cost + mandi_fee + misc_costs)
+    net_profit     = _round(gross_revenue - total_costs)
+    sold = quantity_kg > 0
+    profit_per_kg  = np.where(sold, _round(
+                        net_profit / np.where(sold, quantity_kg, 1)),
+                        0.0)
+
+    return {
+        'gross_revenue':    gross_revenue,
+        'transport_cost':   transport_cost,
+        'mandi_fee':        mandi_fee,
+        'misc_costs':       misc_costs,
+        'total_costs':      total_costs,
+        'net_profit':       net_profit,
+        'profit_per_kg':    profit_per_kg,
+    }
+
+
+def calc_transport_array(distance_km, quantity_kg):
+    """
+    calc_transport over arrays of distances and quantities
+    (broadcast against each other).
+
+    Returns
+    -------
+    float64 array of transport costs in ₹
+    """
+    return _transport_columns(distance_km, quantity_kg)
+
+
 def calc_transport(distance_km, quantity_kg):
     """
     Tiered transport cost based on truck size.
@@ -124,20 +280,34 @@ def calc_transport(distance_km, quantity_kg):
     - Medium (≤5000 kg): ₹18/km + ₹400 loading
     - Large  (>5000 kg): ₹25/km + ₹600 loading
     """
-    if quantity_kg <= 1000:
-        rate, loading, minimum = 12, 200, 500
-    elif quantity_kg <= 5000:
-        rate, loading, minimum = 18, 400, 800
-    else:
-        rate, loading, minimum = 25, 600, 1200
-
-    cost = distance_km * rate + loading
-    return round(max(cost, minimum), 2)
+    return _transport_columns(distance_km, quantity_kg).item()
 
 
 # ─────────────────────────────────────────────────────────
 # PROFIT CALCULATOR
 # ─────────────────────────────────────────────────────────
+def calc_profit_array(quantity_kg, price_per_quintal, distance_km):
+    """
+    Profit breakdown for many (quantity, price, distance)
+    combinations at once — inputs are broadcast against each
+    other, so a single quantity can go with arrays of prices
+    and distances.
+
+    Parameters
+    ----------
+    quantity_kg       : array  weight in kg
+    price_per_quintal : array  predicted price ₹/quintal
+    distance_km       : array  road distance in km
+
+    Returns
+    -------
+    DataFrame with one row per element and PROFIT_COLUMNS,
+    equal to calc_profit on the same NumPy numbers
+    """
+    return pd.DataFrame(_profit_columns(
+        quantity_kg, price_per_quintal, distance_km))
+
+
 def calc_profit(quantity_kg, price_per_quintal,
                 distance_km):
     """
@@ -153,37 +323,285 @@ def calc_profit(quantity_kg, price_per_quintal,
     -------
     dict with full profit breakdown
     """
-    qty_quintals = quantity_kg / 100
+    columns = _profit_columns(quantity_kg, price_per_quintal, distance_km)
+    return {k: v.item() for k, v in columns.items()}
 
-    gross_revenue  = round(price_per_quintal
-                           * qty_quintals, 2)
-    transport_cost = calc_transport(
-                        distance_km, quantity_kg)
-    mandi_fee      = round(gross_revenue * 0.02, 2)
-    misc_costs     = round(qty_quintals * 10, 2)
-    total_costs    = round(
-                        transport_cost +
-                        mandi_fee + misc_costs, 2)
-    net_profit     = round(
-                        gross_revenue - total_costs, 2)
-    profit_per_kg  = round(
-                        net_profit / quantity_kg, 2) \
-                     if quantity_kg > 0 else 0
 
-    return {
-        'gross_revenue':    gross_revenue,
-        'transport_cost':   transport_cost,
-        'mandi_fee':        mandi_fee,
-        'misc_costs':       misc_costs,
-        'total_costs':      total_costs,
-        'net_profit':       net_profit,
-        'profit_per_kg':    profit_per_kg,
-    }
+# ── Ranking ──────────────────────────────────────────────
+def _top_n(values, n):
+    """
+    Indices of the n largest values, largest first, ties in
+    input order — what a stable descending sort gives, without
+    sorting everything.
+    """
+    candidates = np.arange(len(values))
+    if 0 < n < len(values):
+        kth = np.partition(values, len(values) - n)[len(values) - n]
+        candidates = np.flatnonzero(values >= kth)
+    order = candidates[np.lexsort((candidates, -values[candidates]))]
+    return order[:n]
 
 
 # ─────────────────────────────────────────────────────────
 # MARKET RECOMMENDER
 # ─────────────────────────────────────────────────────────
+def _candidate_markets(commodity, farmer_district, farmer_state,
+                       target_month, target_year, max_distance_km):
+    """
+    Reachable markets as columns: market, district, state,
+    distance and bound (upper bound on the
+    predicted price) — everything in a recommendation that doesn't
+    depend on quantity, so one cached set serves every quantity.
+    Prices are filled in lazily, as searches need them
+    (_score_markets): prices (NaN where none) and scored.
+    """
+    _load_data()
+    origin = _district_id(farmer_district, farmer_state)
+    key = (active_version(), commodity, origin,
+           target_month, target_year, max_distance_km)
+    c = _candidates.get(key)
+    if c is None:
+        c = _find_candidates(commodity, origin, target_month,
+                             target_year, max_distance_km)
+        _candidates.put(key, c)
+    else:
+        print(f"\n[INFO] {len(c.market)} cached candidate markets "
+              f"for {commodity}")
+    return c
+
+
+def _find_candidates(commodity, origin, target_month, target_year,
+                     max_distance_km):
+    """_candidate_markets for a farmer at centroid row `origin`."""
+    # Get all markets that trade this commodity
+    # from the price dataset (real trading history)
+    all_markets = data_store.markets(active_model_dir(), commodity)
+
+    print(f"\n[INFO] Evaluating {len(all_markets)} markets "
+          f"for {commodity}...")
+
+    # Markets whose history can never produce a price are
+    # dropped up front (see predict.resolution_table)
+    t = _market_table(commodity)
+    skipped = len(all_markets) - len(t.market)
+
+    # Only markets in grid cells within reach of the farmer are
+    # looked at, plus those the grid can't place
+    if origin is None:
+        cand = np.arange(len(t.market))
+    else:
+        cand = np.union1d(t.grid_pos[t.grid.candidates(
+            _coords[origin, 0], _coords[origin, 1], max_distance_km)],
+            t.off_grid)
+    dest = t.rows[cand]
+
+    # Distances from one row of the matrix; unknown → 999 km
+    unknown  = (dest < 0) | (origin is None)
+    distance = np.full(len(cand), 999.0)
+    if not unknown.all():
+        distance[~unknown] = _distances[origin][dest[~unknown]]
+
+    # Skip if too far or coordinates unknown
+    near = ~(distance > max_distance_km)
+    skipped += len(t.market) - int(near.sum())
+    near, distance = cand[near], distance[near]
+
+    print(f"   Found {len(near)} reachable markets "
+          f"(skipped {skipped})")
+
+    c = SimpleNamespace(
+        market   = t.market[near],
+        district = t.district[near],
+        state    = t.state[near],
+        district_id = t.rows[near],
+        distance = distance,
+        bound    = _price_bounds(t, commodity, target_month)[near],
+    )
+    for column in vars(c).values():    # shared through the cache
+        column.flags.writeable = False
+    c.commodity    = commodity
+    c.target_month = target_month
+    c.target_year  = target_year
+    c.prices = np.full(len(near), np.nan)
+    c.scored = np.zeros(len(near), dtype=bool)
+    c.lock   = threading.Lock()
+    return c
+
+
+def _price_bounds(t, commodity, target_month):
+    """
+    predict.price_upper_bounds for every market of a market
+    table in a month — the same for every target year, so kept
+    on the table.
+    """
+    bounds = t.bounds.get(target_month)
+    if bounds is None:
+        bounds = price_upper_bounds(pd.DataFrame({
+            'district':     t.district,
+            'commodity':    commodity,
+            'state':        t.state,
+            'target_month': target_month,
+            'target_year':  0,
+            'market':       t.market,
+        }))
+        t.bounds[target_month] = bounds
+    return bounds
+
+
+def _score_markets(c, positions):
+    """
+    Predict prices for the candidates at `positions` not scored
+    yet, in one model call. Returns how many were predicted.
+    """
+    with c.lock:
+        todo = positions[~c.scored[positions]]
+        if len(todo):
+            prices = predict_price_many(pd.DataFrame({
+                'district':     c.district[todo],
+                'commodity':    c.commodity,
+                'state':        c.state[todo],
+                'target_month': c.target_month,
+                'target_year':  c.target_year,
+                'market':       c.market[todo],
+            }))
+            c.prices[todo] = [p if p is not None and p > 0 else np.nan
+                              for p in prices]
+            c.scored[todo] = True
+    return len(todo)
+
+
+def _priced(c, positions, quantity_kg):
+    """(markets, profit) columns for the priced candidates at positions."""
+    positions = positions[c.prices[positions] > 0]
+    m = SimpleNamespace(market   = c.market[positions],
+                        district = c.district[positions],
+                        state    = c.state[positions],
+                        district_id = c.district_id[positions],
+                        distance = c.distance[positions],
+                        prices   = c.prices[positions])
+    profit = _profit_columns(quantity_kg, m.prices, m.distance)
+    return m, profit
+
+
+# Net profit bounds are compared with this much to spare, for the
+# rounding of each profit figure to 0.01
+PRUNE_SLACK = 0.05
+
+_search_lock  = threading.Lock()
+_search_count = {'searches': 0, 'markets': 0, 'scored': 0,
+                 'predicted': 0}
+
+
+def _search(c, quantity_kg, top_n):
+    """
+    Branch and bound over the candidates: markets are scored in
+    order of their net-profit upper bound (from c.bound), in
+    growing batches, until the next bound can't reach the current
+    top_n-th net profit. The markets left are never predicted;
+    the top_n is exactly that of scoring every market.
+
+    Returns (markets, profit) for the markets scored.
+    """
+    n = len(c.market)
+    order = np.empty(0, dtype=np.int64)
+    if n and top_n > 0:
+        # Net profit never falls as the price rises (for a positive
+        # quantity), so the bound price gives a bound on it
+        hopeless = c.bound <= 0.01          # can only predict ≤ 0
+        finite   = np.isfinite(c.bound)
+        ub = _profit_columns(quantity_kg, np.where(finite, c.bound, 0),
+                             c.distance)['net_profit']
+        if not quantity_kg > 0:
+            ub = np.full(n, np.inf)
+        ub = np.where(finite, ub, np.inf)
+        order = np.argsort(-ub, kind='stable')
+        order = order[~hopeless[order]]
+
+    done, batch, predicted = 0, top_n, 0
+    while done < len(order):
+        predicted += _score_markets(c, order[done:done + batch])
+        done += batch
+        batch *= 2
+        if done >= len(order) or not quantity_kg > 0:
+            continue
+        m, profit = _priced(c, order[:done], quantity_kg)
+        net = profit['net_profit']
+        if len(net) >= top_n:
+            kth = np.partition(net, len(net) - top_n)[len(net) - top_n]
+            if ub[order[done]] < kth - PRUNE_SLACK:
+                break
+    scored = np.sort(order[:done])
+
+    with _search_lock:
+        _search_count['searches']  += 1
+        _search_count['markets']   += n
+        _search_count['scored']    += len(scored)
+        _search_count['predicted'] += predicted
+    print(f"   Scored {len(scored)} of {n} markets "
+          f"({n - len(scored)} pruned)")
+    return _priced(c, scored, quantity_kg)
+
+
+def search_stats():
+    """
+    Counters of the top-N market search: searches run, candidate
+    markets they covered, markets scored, prices actually
+    predicted (not already on cached candidates), and pruned —
+    the model invocations the bounds avoided.
+    """
+    with _search_lock:
+        stats = dict(_search_count)
+    stats['pruned'] = stats['markets'] - stats['scored']
+    return stats
+
+
+def _best_markets(m, profit, origin, top_n):
+    """
+    Result dicts for the top_n markets of m by net profit, for a
+    farmer at district id `origin` (None if unknown).
+    """
+    results = []
+    for j in _top_n(profit['net_profit'], top_n):
+        results.append({
+            # Market info
+            'market':           m.market[j],
+            'district':         m.district[j],
+            'state':            m.state[j],
+            'distance_km':      float(m.distance[j]),
+            'is_same_district': bool(
+                origin is not None and
+                m.district_id[j] == origin),
+            # Price
+            'predicted_price':  float(m.prices[j]),
+            # Profit breakdown
+            **{k: v[j].item() for k, v in profit.items()}
+        })
+    return results
+
+
+def _precomputed(commodity, quantity_kg, farmer_district,
+                 farmer_state, target_month, target_year,
+                 max_distance_km, top_n):
+    """
+    (markets, profit) from the active version's recommendation
+    table, or None when there is none or it doesn't cover the
+    question.
+    """
+    _load_data()
+    table = get_table(active_model_dir(), target_year)
+    if table is None:
+        return None
+    origin = _district_id(farmer_district, farmer_state)
+    if origin is None:
+        return None
+    hit = table.lookup(origin, commodity, target_month, quantity_kg,
+                       max_distance_km, top_n)
+    if hit is not None:
+        print(f"\n[INFO] Precomputed answer for {commodity} "
+              f"({target_year} table)")
+    return hit
+
+
 def recommend(commodity, quantity_kg,
               farmer_district, farmer_state,
               target_month, target_year,
@@ -206,114 +624,90 @@ def recommend(commodity, quantity_kg,
     -------
     list of dicts, sorted by net_profit descending
     """
+    # SMS / web questions are usually precomputed
+    # (see recommendation_table.py)
     _load_data()
+    origin = _district_id(farmer_district, farmer_state)
+    hit = _precomputed(commodity, quantity_kg, farmer_district,
+                       farmer_state, target_month, target_year,
+                       max_distance_km, top_n)
+    if hit is not None:
+        return _best_markets(*hit, origin, top_n)
+
+    c = _candidate_markets(commodity, farmer_district, farmer_state,
+                           target_month, target_year, max_distance_km)
+    m, profit = _search(c, quantity_kg, top_n)
+    return _best_markets(m, profit, origin, top_n)
+
+
+def recommend_sweep(commodity, quantities,
+                    farmer_district, farmer_state,
+                    target_month, target_year,
+                    max_distance_km=150, top_n=5):
+    """
+    recommend() for several quantities at once — to see how the
+    best markets and net profit move as the load crosses the
+    truck tiers (≤1000, ≤5000, >5000 kg).
 
-    # Get all markets that trade this commodity
-    # from the price dataset (real trading history)
-    price_df = _price_df
-    markets = price_df[
-        price_df['commodity'] == commodity
-    ][['market', 'district', 'state']]\
-     .drop_duplicates()\
-     .reset_index(drop=True)
-
-    print(f"\n[INFO] Evaluating {len(markets)} markets "
-          f"for {commodity}...")
-
-    results = []
-    skipped = 0
-
-    for _, row in markets.iterrows():
-        mkt_market   = row['market']
-        mkt_district = row['district']
-        mkt_state    = row['state']
-
-        # Calculate distance
-        dist = get_distance(
-            farmer_district, mkt_district,
-            farmer_state,    mkt_state
-        )
-
-        # Skip if too far or coordinates unknown
-        if dist > max_distance_km:
-            skipped += 1
-            continue
-
-        # Predict price at this market
-        price = predict_price(
-            district      = mkt_district,
-            commodity     = commodity,
-            state         = mkt_state,
-            target_month  = target_month,
-            target_year   = target_year,
-            market        = mkt_market
-        )
-
-        if price is None or price <= 0:
-            skipped += 1
-            continue
-
-        # Calculate profit
-        profit = calc_profit(quantity_kg, price, dist)
+    Distances and prices are worked out once; profits for the
+    whole quantity × market grid come from one array call.
 
-        results.append({
-            # Market info
-            'market':           mkt_market,
-            'district':         mkt_district,
-            'state':            mkt_state,
-            'distance_km':      dist,
-            'is_same_district': (
-                mkt_district.lower() ==
-                farmer_district.lower()),
-            # Price
-            'predicted_price':  price,
-            # Profit breakdown
-            **profit
-        })
+    Parameters
+    ----------
+    commodity        : str   e.g. 'Tomato'
+    quantities       : list  kg, e.g. [500, 1000, 1001, 5000, 8000]
+    (the rest as in recommend)
 
-    print(f"   Found {len(results)} reachable markets "
-          f"(skipped {skipped})")
+    Returns
+    -------
+    dict {quantity_kg: list of dicts} in `quantities` order,
+    each list what recommend() returns for that quantity
+    """
+    c = _candidate_markets(commodity, farmer_district, farmer_state,
+                           target_month, target_year, max_distance_km)
+    everything = np.arange(len(c.market))
+    _score_markets(c, everything)
+    m, _ = _priced(c, everything, 0)
 
-    # Sort by net profit
-    results.sort(key=lambda x: x['net_profit'],
-                 reverse=True)
+    # Quantities down the rows, markets across the columns
+    quantities = list(quantities)
+    profit = _profit_columns(
+        np.asarray(quantities, dtype=np.float64)[:, None],
+        m.prices[None, :], m.distance[None, :])
 
-    return results[:top_n]
+    origin = _district_id(farmer_district, farmer_state)
+    return {q: _best_markets(m, {k: v[i] for k, v in profit.items()},
+                             origin, top_n)
+            for i, q in enumerate(quantities)}
 
 
 # ─────────────────────────────────────────────────────────
 # PINCODE LOOKUP (for SMS teammate)
 # ─────────────────────────────────────────────────────────
-_pincode_df = None
-
 def lookup_pincode(pincode):
     """
     Convert pincode → district + state.
-    Uses local india_pincode_final.csv (no internet needed).
+    Uses the local pincode index (data_store.pincode_index,
+    built from india pincode final.csv — no internet needed).
 
-    Returns dict with district, state, valid flag.
+    Returns dict with district, state, district_id (its centroid
+    row, -1 if none — see districts.py), valid flag.
     """
-    global _pincode_df
-    if _pincode_df is None:
-        _pincode_df = pd.read_csv(
-    'datasets/india pincode final.csv')
-        _pincode_df['pincode'] = \
-            _pincode_df['pincode'].astype(str).str.strip()
-
-    pin_str = str(pincode).strip()
-    match   = _pincode_df[
-        _pincode_df['pincode'] == pin_str]
+    index = data_store.pincode_index()
+    match = index.lookup(pincode)
 
-    if match.empty:
+    if match is None:
         return {'valid': False,
                 'district': None,
-                'state': None}
+                'state': None,
+                'district_id': None}
 
-    row = match.iloc[0]
+    district, state = match
     return {
-        'valid':    True,
-        'district': row['Districtname'].title(),
-        'state':    row['statename'].title(),
+        'valid':       True,
+        'district':    district.title(),
+        'state':       state.title(),
+        'district_id': index.lookup_id(pincode),
     }
 
 
@@ -321,6 +715,12 @@ def lookup_pincode(pincode):
 # QUICK TEST
 # ─────────────────────────────────────────────────────────
 if __name__ == '__main__':
+    import contextlib
+    import io
+    import time
+    from history import read_history
+    from predict import predict_price, _cache
+
     print("=" * 60)
     print("TEST 1: Distance calculation")
     print("=" * 60)
@@ -329,8 +729,8 @@ if __name__ == '__main__':
         ('Coimbatore', 'Madurai',  'Tamil Nadu', 'Tamil Nadu'),
         ('Nashik',     'Pune',     'Maharashtra','Maharashtra'),
     ]
-    for o, d, os, ds in pairs:
-        dist = get_distance(o, d, os, ds)
+    for o, d, o_state, d_state in pairs:
+        dist = get_distance(o, d, o_state, d_state)
         print(f"  {o} → {d}: {dist} km")
 
     print("\n" + "=" * 60)
@@ -375,7 +775,158 @@ if __name__ == '__main__':
         print("  No markets found — check distance filter")
 
     print("\n" + "=" * 60)
-    print("TEST 4: Pincode lookup")
+    print("TEST 4: Columnar recommend vs per-market loop")
+    print("=" * 60)
+
+    history = read_history(active_model_dir(),
+                           columns=['commodity', 'market',
+                                    'district', 'state'])
+
+    def _recommend_loop(commodity, quantity_kg, farmer_district,
+                        farmer_state, target_month, target_year,
+                        max_distance_km, top_n):
+        """The loop recommend() replaced, with its round() arithmetic."""
+        markets = history[history['commodity'] == commodity][
+            ['market', 'district', 'state']].drop_duplicates()
+        origin = _district_id(farmer_district, farmer_state)
+        rows = []
+        for _, row in markets.iterrows():
+            dist = get_distance(farmer_district, row['district'],
+                                farmer_state,    row['state'])
+            if dist > max_distance_km:
+                continue
+            price = predict_price(row['district'], commodity,
+                                  row['state'], target_month,
+                                  target_year, row['market'])
+            if price is None or price <= 0:
+                continue
+            rate, loading, minimum = next(
+                t[1:] for t in TRUCK_TIERS if quantity_kg <= t[0])
+            qty_quintals   = quantity_kg / 100
+            gross_revenue  = round(float(price) * qty_quintals, 2)
+            transport_cost = round(max(float(dist) * rate + loading,
+                                       minimum), 2)
+            mandi_fee      = round(gross_revenue * 0.02, 2)
+            misc_costs     = round(qty_quintals * 10, 2)
+            total_costs    = round(transport_cost + mandi_fee
+                                   + misc_costs, 2)
+            net_profit     = round(gross_revenue - total_costs, 2)
+            rows.append({
+                'market': row['market'], 'district': row['district'],
+                'state': row['state'], 'distance_km': dist,
+                'is_same_district': (origin is not None and
+                                     _district_id(row['district'],
+                                                  row['state']) == origin),
+                'predicted_price': price,
+                **dict(zip(PROFIT_COLUMNS, [
+                    gross_revenue, transport_cost, mandi_fee,
+                    misc_costs, total_costs, net_profit,
+                    round(net_profit / quantity_kg, 2)
+                    if quantity_kg > 0 else 0]))})
+        rows.sort(key=lambda x: x['net_profit'], reverse=True)
+        return rows[:top_n]
+
+    cases = [(c, q, 'Coimbatore', 'Tamil Nadu', m, 2025, 300, 10)
+             for c in ['Tomato', 'Onion', 'Potato']
+             for q in [100, 250, 1500, 6000]
+             for m in [1, 6]]
+    with contextlib.redirect_stdout(io.StringIO()):
+        _cache.clear()          # time both without cached prices
+        t0 = time.perf_counter()
+        reference = [_recommend_loop(*case) for case in cases]
+        t1 = time.perf_counter()
+        _cache.clear()
+        _candidates.clear()
+        columnar  = [recommend(*case) for case in cases]
+        t2 = time.perf_counter()
+    print(f"  {len(cases)} queries — identical output: "
+          f"{reference == columnar}")
+    print(f"  per-market loop {1000 * (t1 - t0) / len(cases):,.1f} ms/query, "
+          f"columnar {1000 * (t2 - t1) / len(cases):,.1f} ms/query "
+          f"({(t1 - t0) / (t2 - t1):,.1f}x)")
+
+    print("\n" + "=" * 60)
+    print("TEST 4b: Quantity sweep across truck tiers")
+    print("=" * 60)
+    quantities = [100, 500, 1000, 1001, 2500, 5000, 5001, 8000, 20000]
+    args = ('Tomato', 'Coimbatore', 'Tamil Nadu', 6, 2025, 300, 3)
+    with contextlib.redirect_stdout(io.StringIO()):
+        t0 = time.perf_counter()
+        sweep = recommend_sweep(args[0], quantities, *args[1:])
+        t1 = time.perf_counter()
+    print(f"  {'kg':>6}  {'best market':<28} {'transport':>9} "
+          f"{'net profit':>11}")
+    for q, best in sweep.items():
+        if best:
+            print(f"  {q:>6}  {best[0]['market']:<28} "
+                  f"₹{best[0]['transport_cost']:>8,.0f} "
+                  f"₹{best[0]['net_profit']:>10,.0f}")
+    print(f"  {len(quantities)} quantities in {1000 * (t1 - t0):,.1f} ms")
+
+    print("\n" + "=" * 60)
+    print("TEST 4c: Free-form quantities from cached candidates")
+    print("=" * 60)
+    quantities = [137, 480, 999.5, 1000, 3333, 5000.25, 12000]
+    args = ('Onion', 'Nashik', 'Maharashtra', 3, 2025, 250, 5)
+    with contextlib.redirect_stdout(io.StringIO()):
+        fresh_s = 0.0
+        for q in quantities:
+            _cache.clear()
+            _candidates.clear()
+            t0 = time.perf_counter()
+            recommend(args[0], q, *args[1:])
+            fresh_s += time.perf_counter() - t0
+        _candidates.clear()
+        recommend(args[0], quantities[0], *args[1:])
+        t0 = time.perf_counter()
+        for q in quantities:
+            recommend(args[0], q, *args[1:])
+        cached_s = time.perf_counter() - t0
+    stats = candidate_cache_stats()
+    print(f"  candidate cache: {stats['hits']} hits, {stats['misses']} "
+          f"misses; {1000 * fresh_s / len(quantities):.1f} ms → "
+          f"{1000 * cached_s / len(quantities):.2f} ms per query")
+
+    print("\n" + "=" * 60)
+    print("TEST 4d: Branch-and-bound top-N vs scoring every market")
+    print("=" * 60)
+    rng = np.random.default_rng(0)
+    _load_data()
+    origins = _centroids[['District', 'State']].to_numpy()
+    cases = [(str(rng.choice(['Tomato', 'Onion', 'Potato', 'Wheat', 'Rice'])),
+              int(rng.choice([100, 250, 750, 1000, 2500, 6000, 15000])),
+              *origins[rng.integers(len(origins))],
+              int(rng.integers(1, 13)), 2025,
+              int(rng.choice([100, 200, 300, 500])),
+              int(rng.choice([1, 3, 5])))
+             for _ in range(300)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        _candidates.clear()
+        for c, q, d, s, mo, y, km, n in cases:    # price bounds, once
+            _candidate_markets(c, d, s, mo, y, km)
+        _cache.clear()
+        _candidates.clear()
+        before = search_stats()
+        t0 = time.perf_counter()
+        for case in cases:
+            recommend(*case)
+        t1 = time.perf_counter()
+        after = search_stats()
+        _cache.clear()
+        _candidates.clear()
+        t2 = time.perf_counter()
+        for c, q, d, s, mo, y, km, n in cases:
+            recommend_sweep(c, [q], d, s, mo, y, km, n)
+        t3 = time.perf_counter()
+    markets = after['markets'] - before['markets']
+    scored  = after['scored'] - before['scored']
+    print(f"  {len(cases)} queries: {scored:,} of {markets:,} candidate "
+          f"markets scored, {markets - scored:,} model invocations avoided")
+    print(f"  {1000 * (t1 - t0) / len(cases):.1f} ms/query vs "
+          f"{1000 * (t3 - t2) / len(cases):.1f} ms scoring every market")
+
+    print("\n" + "=" * 60)
+    print("TEST 5: Pincode lookup")
     print("=" * 60)
     for pin in ['641001', '600001', '110001', '999999']:
         result = lookup_pincode(pin)
@@ -10,17 +10,28 @@ import os
 import re
 import sys
 import datetime
-import csv
+import time
+
+_STARTUP_T0 = time.perf_counter()
 
 # ── Set working directory to project root so recommender's relative paths work ─
 _PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 os.chdir(_PROJECT_ROOT)
 sys.path.insert(0, _PROJECT_ROOT)
-from recommender import recommend
+from recommender import recommend, candidate_cache_stats, search_stats
+from predict import (warmup, is_ready, active_version, watch_for_updates,
+                     cache_stats)
+import data_store
 from sms.strings import LANGS, LANG_MENU, STRINGS, t, crop_name
 
 app = Flask(__name__)
 
+# Model artifacts load in the background — the worker answers HELP/MENU/health
+# checks straight away; the first prediction waits for the load if needed.
+warmup(background=True)
+# Pick up a retrained model (model/current) without restarting the dyno
+watch_for_updates(interval=int(os.environ.get("MODEL_WATCH_SECONDS", "300")))
+
 # ── File paths ───────────────────────────────────────────────────────────────
 USERS_FILE    = "registered_users.json"
 SESSIONS_FILE = "/tmp/sessions.json"   # ephemeral per container run — that's fine
@@ -101,228 +112,29 @@ QTY_LABELS = {
 
 
 # ── District name normalisation ───────────────────────────────────────────────
-# Auto-derived by diffing 'india pincode final.csv' district names against
-# 'district wise centroids.csv'. Covers all 26 states.
-# Keys = lowercase pincode-CSV spelling → Value = exact centroid-CSV spelling.
-DISTRICT_ALIASES = {
-    # Andhra Pradesh
-    "ananthapur":               "Anantapur",
-    "karim nagar":              "Karimnagar",
-    "k.v.rangareddy":           "Rangareddi",
-    "visakhapatnam":            "Vishakhapatnam",
-
-    # Assam
-    "dhubri":                   "Dhuburi",
-    "mammit":                   "Mamit",
-
-    # Bihar
-    "east champaran":           "Purba Champaran",
-    "west champaran":           "Pashchim Champaran",
-    "kaimur (bhabua)":          "Bhabua",
-    "palamau":                  "Palamu",
-    "arwal":                    "Jehanabad",       # nearest centroid
-
-    # Chhattisgarh
-    "bijapur(cgh)":             "Bijapur",
-
-    # Delhi
-    "central delhi":            "Delhi",
-    "east delhi":               "Delhi",
-    "new delhi":                "Delhi",
-    "north delhi":              "Delhi",
-    "north west delhi":         "Delhi",
-    "south delhi":              "Delhi",
-    "south west delhi":         "Delhi",
-    "west delhi":               "Delhi",
-
-    # Gujarat
-    "ahmedabad":                "Ahmadabad",
-    "ahmed nagar":              "Ahmednagar",
-    "banaskantha":              "Banas Kantha",
-    "gandhi nagar":             "Gandhinagar",
-    "sabarkantha":              "Sabar Kantha",
-    "surendra nagar":           "Surendranagar",
-
-    # Himachal Pradesh
-    "bilaspur (hp)":            "Bilaspur",
-    "hamirpur(hp)":             "Hamirpur",
-    "lahul & spiti":            "Lahul And Spiti",
-
-    # J&K
-    "ananthnag":                "Anantnag (Kashmir South)",
-    "baramulla":                "Baramula (Kashmir North)",
-    "poonch":                   "Punch",
-    "reasi":                    "Rajauri",         # nearest centroid
-
-    # Jharkhand
-    "giridh":                   "Giridih",
-    "khunti":                   "Ranchi",          # nearest centroid
-    "ramgarh":                  "Ranchi",          # nearest centroid
-    "seraikela-kharsawan":      "Saraikela Kharsawan",
-    "east singhbhum":           "Purba Singhbhum",
-    "west singhbhum":           "Pashchim Singhbhum",
-
-    # Karnataka
-    "bangalore":                "Bangalore Urban",
-    "chickmagalur":             "Chikmagalur",
-    "chikkaballapur":           "Chikmagalur",     # nearest centroid
-    "dakshina kannada":         "Dakshin Kannad",
-    "davangere":                "Davanagere",
-    "ramanagar":                "Bangalore Rural",  # nearest centroid
-    "krishnagiri":              "Dharmapuri",       # nearest centroid
-    "uttara kannada":           "Uttar Kannand",
-    "yadgir":                   "Gulbarga",         # nearest centroid
-    "bijapur(kar)":             "Bijapur",
-
-    # Kerala
-    "kasargod":                 "Kasaragod",
-    "pathanamthitta":           "Pattanamtitta",
-
-    # Madhya Pradesh
-    "alirajpur":                "Jhabua",           # nearest centroid
-    "ashok nagar":              "Ashoknagar",
-    "budaun":                   "Badaun",
-    "khargone":                 "East Nimar",
-    "rajnandgaon":              "Raj Nandgaon",
-    "singrauli":                "Sidhi",            # nearest centroid
-
-    # Maharashtra
-    "aurangabad(bh)":           "Aurangabad",
-    "beed":                     "Bid",
-    "buldhana":                 "Buldana",
-    "gadchiroli":               "Garhchiroli",
-    "gondia":                   "Gondiya",
-    "mumbai":                   "Greater Bombay",
-    "raigarh(mh)":              "Raigarh",
-
-    # Manipur
-    "imphal east":              "East Imphal",
-    "imphal west":              "West Imphal",
-
-    # Meghalaya
-    "ri bhoi":                  "Ri-Bhoi",
-
-    # Nagaland
-    "kiphire":                  "Tuensang",         # nearest centroid
-    "longleng":                 "Mokokchung",       # nearest centroid
-    "peren":                    "Kohima",           # nearest centroid
-
-    # Odisha
-    "balangir":                 "Bolangir",
-    "baleswar":                 "Baleshwar",
-    "bargarh":                  "Baragarh",
-    "debagarh":                 "Deogarh",
-    "gadchiroli":               "Garhchiroli",
-    "jagatsinghapur":           "Jagatsinghpur",
-    "jajapur":                  "Jajpur",
-    "kendujhar":                "Keonjhar",
-    "khorda":                   "Khordha",
-    "nabarangapur":             "Nabarangpur",
-    "sonapur":                  "Sonepur",
-    "sundergarh":               "Sundargarh",
-
-    # Puducherry
-    "pondicherry":              "Puducherry",
-
-    # Punjab
-    "nawanshahr":               "Nawan Shehar",
-    "ropar":                    "Rupnagar",
-
-    # Rajasthan
-    "chittorgarh":              "Chittaurgarh",
-    "dholpur":                  "Dhaulpur",
-    "jhujhunu":                 "Jhunjhunun",
-
-    # Tamil Nadu
-    "tiruchirappalli":          "Tiruchchirappalli",
-    "tiruchirapalli":           "Tiruchchirappalli",
-    "tiruchi":                  "Tiruchchirappalli",
-    "trichy":                   "Tiruchchirappalli",
-    "tirunelveli":              "Tirunelveli Kattabo",
-    "tiruvallur":               "Thiruvallur",
-    "tiruvarur":                "Thiruvarur",
-    "kancheepuram":             "Kancheepuram",
-    "kanchipuram":              "Kancheepuram",
-    "the nilgiris":             "Nilgiris",
-    "tuticorin":                "Thoothukudi",
-    "kanyakumari":              "Kanniyakumari",
-    "chengalpattu":             "Kancheepuram",     # nearest centroid
-    "ranipet":                  "Vellore",           # nearest centroid
-    "tiruppur":                 "Tirupur",
-
-    # Uttar Pradesh
-    "barabanki":                "Bara Banki",
-    "bagpat":                   "Baghpat",
-    "raebareli":                "Rae Bareli",
-    "sant ravidas nagar":       "Sant Ravi Das Nagar",
-    "siddharthnagar":           "Siddharth Nagar",
-    "shrawasti":                "Shravasti",
-    "budaun":                   "Badaun",
-    "kanpur nagar":             "Kanpur",
-    "kheri":                    "Lakhimpur Kheri",
-
-    # Uttarakhand
-    "dehradun":                 "Dehra Dun",
-    "nainital":                 "Naini Tal",
-    "rudraprayag":              "Rudra Prayag",
-
-    # West Bengal
-    "bardhaman":                "Barddhaman",
-    "howrah":                   "Haora",
-    "malda":                    "Maldah",
-    "north dinajpur":           "Uttar Dinajpur",
-    "south dinajpur":           "Dakshin Dinajpur",
-    "sonipat":                  "Sonepat",
-
-    # Other / Union Territories
-    "dadra & nagar haveli":     "Dadra And Nagar Haveli",
-    "lakshadweep":              "Kavaratti",
-    "east sikkim":              "East",
-    "dibang valley":            "Upper Dibang Valley",
-    "bilaspur(cgh)":            "Bilaspur",
-}
-
+# Spellings are resolved to district ids once, by districts.py (one alias table
+# for the pincode CSV, the centroid CSV and the price data) — a pincode's id
+# comes straight from the pincode index, see pincode_to_district.
 
 
-def normalize_district(raw: str) -> str:
+# ── Load pincode → district index (no network needed) ─────────────────────────
+def _load_pincode_db():
     """
-    Corrects known spelling mismatches for centroid lookup.
-    Returns the corrected district name, or raw.title() if no alias exists.
-    Never returns None — all districts are accepted.
+    data_store.pincode_index() — built from 'india pincode final.csv'
+    once, then read from its .npz; lookup(pincode) → (district, state)
+    via one array read. None if the CSV is missing.
     """
-    key = raw.strip().lower()
-    if key in DISTRICT_ALIASES:
-        return DISTRICT_ALIASES[key]
-    return raw.strip().title()
-
-
-
-# ── Load pincode → district from local CSV (no network needed) ────────────────
-_CSV_PATH = os.path.join(
-    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-    "datasets", "india pincode final.csv"
-)
-
-def _load_pincode_db(path: str) -> dict:
-    """
-    Reads 'india pincode final.csv' (columns: pincode, Taluk, Districtname, statename)
-    and returns {pincode_str: (district, state)} for O(1) lookup.
-    """
-    db = {}
     try:
-        with open(path, newline="", encoding="latin-1") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                pin  = str(row.get("pincode", "")).strip().zfill(6)
-                dist = row.get("Districtname", "").strip()
-                state = row.get("statename", "").strip().title()  # 'TAMIL NADU' → 'Tamil Nadu'
-                if pin and dist:
-                    db[pin] = (dist, state)
+        return data_store.pincode_index()
     except FileNotFoundError:
-        print(f"[WARNING] Pincode DB not found at {path}. Pincode lookup will fail.")
-    return db
+        print(f"[WARNING] Pincode DB not found at {data_store.PINCODE_CSV}. "
+              f"Pincode lookup will fail.")
+        return None
 
-PINCODE_DB = _load_pincode_db(_CSV_PATH)
+PINCODE_DB = _load_pincode_db()
+
+print(f"[startup] sms_handler ready in {time.perf_counter() - _STARTUP_T0:.2f}s "
+      f"(model loading in background)")
 
 
 # ── Pincode → District via local CSV ──────────────────────────────────────────
@@ -330,15 +142,18 @@ def pincode_to_district(pincode: str):
     """
     Returns (raw_district, state, normalized_district, error).
     - error: 'bad_pincode' | 'not_found' | None (success)
-    Fully offline — uses PINCODE_DB loaded from local CSV at startup.
+    Fully offline — uses PINCODE_DB (the pincode index) loaded at startup.
     """
     if not re.fullmatch(r"\d{6}", pincode):
         return None, None, None, "bad_pincode"
-    result = PINCODE_DB.get(pincode)
+    result = PINCODE_DB.lookup(pincode) if PINCODE_DB is not None else None
     if result is None:
         return None, None, None, "not_found"
     raw_district, state = result
-    normalized = normalize_district(raw_district)
+    state = state.title()  # 'TAMIL NADU' → 'Tamil Nadu'
+    # Centroid-CSV name of the district id resolved with the index
+    normalized = (data_store.district_ids().name(PINCODE_DB.lookup_id(pincode))
+                  or raw_district.strip().title())
     return raw_district, state, normalized, None
 
 
@@ -367,6 +182,16 @@ def send(msg: str):
 
 
 
+# ── Health check ─────────────────────────────────────────────────────────────
+@app.route("/health", methods=["GET"])
+def health():
+    return {"status": "ok", "model_loaded": is_ready(),
+            "model_version": active_version() if is_ready() else None,
+            "prediction_cache": cache_stats(),
+            "candidate_cache": candidate_cache_stats(),
+            "market_search": search_stats()}
+
+
 # ── Main Twilio webhook ───────────────────────────────────────────────────────
 @app.route("/sms", methods=["POST"])
 def sms_reply():
@@ -0,0 +1,56 @@
+"""
+Shared fixtures.
+
+Tests run from the repository root, where artifacts.py looks for
+model/. Those that need a trained model version and the reference
+datasets skip when the checkout has none (they are not in git):
+train with `python train_model.py` first.
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope='session', autouse=True)
+def _repo_root():
+    cwd = os.getcwd()
+    os.chdir(ROOT)
+    yield
+    os.chdir(cwd)
+
+
+@pytest.fixture(scope='session')
+def model_dir(_repo_root):
+    """Directory of the active model version — skips without one."""
+    import artifacts
+    import data_store
+    from history import history_files
+
+    _, path = artifacts.resolve()
+    needed = [os.path.join(path, 'price_model.joblib'),
+              history_files(path)[0],
+              data_store.CENTROIDS_CSV, data_store.FINAL_DATA_CSV,
+              data_store.PINCODE_CSV]
+    missing = [p for p in needed if not os.path.exists(p)]
+    if missing:
+        pytest.skip(f"needs a trained model and the datasets "
+                    f"({os.path.relpath(missing[0], ROOT)} is missing)")
+    return path
+
+
+@pytest.fixture
+def no_caches(model_dir):
+    """Empty prediction and candidate caches around a test."""
+    import predict
+    import recommender
+
+    predict._cache.clear()
+    recommender._candidates.clear()
+    yield
+    predict._cache.clear()
+    recommender._candidates.clear()
@@ -0,0 +1,10 @@
+"""Model version bookkeeping."""
+
+from artifacts import new_version
+
+
+def test_new_versions_in_one_second_get_distinct_ordered_ids(tmp_path):
+    created = [new_version(str(tmp_path)) for _ in range(5)]
+    ids = [version for version, _ in created]
+    assert len(set(ids)) == len(ids)
+    assert ids == sorted(ids)
@@ -0,0 +1,24 @@
+"""Datasets handed out by data_store are read-only views."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_store
+
+
+def test_frame_views_do_not_write_through():
+    frame = pd.DataFrame({'price': [1.0, 2.0], 'market': ['a', 'b']})
+    view = data_store._view(frame)
+    view.loc[0, 'price'] = 9.0
+    view['price'] *= 2
+    view['extra'] = 1
+    assert frame.to_dict('list') == {'price': [1.0, 2.0],
+                                     'market': ['a', 'b']}
+
+
+def test_array_views_are_not_writeable():
+    array = np.arange(3)
+    with pytest.raises(ValueError):
+        data_store._view(array)[0] = 7
+    assert array.tolist() == [0, 1, 2]
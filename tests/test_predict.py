@@ -0,0 +1,53 @@
+"""predict_price_many — one batched model call per set of queries."""
+
+import numpy as np
+
+import data_store
+import predict
+
+
+def _queries(model_dir):
+    """Known markets of every commodity, a few months, plus misses."""
+    queries = []
+    for commodity in ['Tomato', 'Onion', 'Potato', 'Wheat', 'Rice']:
+        markets = data_store.markets(model_dir, commodity)
+        for market, district, state in markets.head(15).itertuples(
+                index=False, name=None):
+            for month in (1, 6, 12):
+                queries.append((district, commodity, state, month,
+                                2025, market))
+                queries.append((district, commodity, state, month,
+                                2026, None))
+    queries += [('Nowhere', 'Tomato', 'Tamil Nadu', 6, 2025, None),
+                ('Salem', 'Saffron', 'Tamil Nadu', 6, 2025, None)]
+    return queries
+
+
+def test_batch_matches_one_by_one(model_dir, no_caches):
+    queries = _queries(model_dir)
+    one_by_one = [predict.predict_price(*q) for q in queries]
+    predict._cache.clear()
+    batch = predict.predict_price_many(queries)
+
+    assert any(p is not None for p in one_by_one)
+    assert list(batch) == one_by_one
+
+
+def test_batch_order_and_cache_do_not_change_prices(model_dir, no_caches):
+    queries = _queries(model_dir)
+    fresh = predict.predict_price_many(queries)
+    order = np.random.default_rng(0).permutation(len(queries))
+    shuffled = predict.predict_price_many([queries[i] for i in order])
+
+    assert list(shuffled) == [fresh[i] for i in order]
+
+
+def test_booster_and_numpy_trees_agree(model_dir, no_caches, monkeypatch):
+    queries = _queries(model_dir)
+    assert len(queries) >= predict.BOOSTER_MIN_ROWS
+    booster = predict.predict_price_many(queries)
+    assert predict._get_artifacts().booster is not None
+
+    predict._cache.clear()
+    monkeypatch.setattr(predict, 'BOOSTER_MIN_ROWS', len(queries) + 1)
+    assert list(predict.predict_price_many(queries)) == list(booster)
@@ -0,0 +1,79 @@
+"""calc_profit / calc_profit_array against the scalar arithmetic."""
+
+import random
+
+import numpy as np
+import pytest
+
+from recommender import (PROFIT_COLUMNS, calc_profit, calc_profit_array,
+                         calc_transport, calc_transport_array)
+
+
+def _profit_reference(quantity_kg, price_per_quintal, distance_km):
+    """The scalar arithmetic calc_profit replaced, on Python floats."""
+    quantity_kg, price_per_quintal, distance_km = (
+        float(quantity_kg), float(price_per_quintal), float(distance_km))
+    if quantity_kg <= 1000:
+        rate, loading, minimum = 12, 200, 500
+    elif quantity_kg <= 5000:
+        rate, loading, minimum = 18, 400, 800
+    else:
+        rate, loading, minimum = 25, 600, 1200
+    qty_quintals   = quantity_kg / 100
+    gross_revenue  = round(price_per_quintal * qty_quintals, 2)
+    transport_cost = round(max(distance_km * rate + loading, minimum), 2)
+    mandi_fee      = round(gross_revenue * 0.02, 2)
+    misc_costs     = round(qty_quintals * 10, 2)
+    total_costs    = round(transport_cost + mandi_fee + misc_costs, 2)
+    net_profit     = round(gross_revenue - total_costs, 2)
+    profit_per_kg  = (round(net_profit / quantity_kg, 2)
+                      if quantity_kg > 0 else 0)
+    return dict(zip(PROFIT_COLUMNS, [
+        gross_revenue, transport_cost, mandi_fee, misc_costs,
+        total_costs, net_profit, profit_per_kg]))
+
+
+def _cases(n=20_000):
+    """Tier edges, .xx5 ties, Python and NumPy number types."""
+    rng = random.Random(0)
+    kinds = [int, float, np.float64]
+    cases = []
+    for _ in range(n):
+        q = rng.choice([0, 1, 7, 999, 1000, 1001, 5000, 5001,
+                        rng.randint(1, 20_000),
+                        round(rng.uniform(1, 9000), 1)])
+        p = round(rng.uniform(100, 9000), rng.choice([0, 1, 2]))
+        d = rng.choice([999, 0, round(rng.uniform(0, 400), 1),
+                        rng.uniform(0, 400)])
+        cases.append((rng.choice(kinds)(q), rng.choice(kinds[1:])(p),
+                      rng.choice(kinds)(d)))
+    return cases
+
+
+CASES = _cases()
+
+
+def test_scalar_matches_reference():
+    bad = [c for c in CASES if calc_profit(*c) != _profit_reference(*c)]
+    assert not bad, f"{len(bad)} cases differ, e.g. {bad[0]}"
+
+
+def test_array_matches_reference():
+    q, p, d = (np.array(col, dtype=np.float64) for col in zip(*CASES))
+    rows = calc_profit_array(q, p, d).to_dict('records')
+    bad = [c for row, c in zip(rows, CASES) if row != _profit_reference(*c)]
+    assert not bad, f"{len(bad)} cases differ, e.g. {bad[0]}"
+
+
+def test_number_type_does_not_matter():
+    for q, p, d in CASES[:2_000]:
+        assert (calc_profit(int(q) if q == int(q) else q, float(p), d) ==
+                calc_profit(np.float64(q), np.float64(p), np.float64(d)))
+
+
+@pytest.mark.parametrize('quantity_kg', [0, 500, 1000, 1001, 5000, 5001,
+                                         20_000])
+def test_transport_array_matches_scalar(quantity_kg):
+    distances = np.array([0, 1.5, 10, 33.3, 120, 999])
+    assert calc_transport_array(distances, quantity_kg).tolist() == [
+        calc_transport(float(d), quantity_kg) for d in distances]
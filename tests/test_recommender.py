@@ -0,0 +1,155 @@
+"""recommend() and friends against straightforward reference versions."""
+
+import pytest
+
+import recommender
+from history import read_history
+from predict import predict_price
+from recommender import get_distance, recommend
+from test_profit import _profit_reference
+
+
+def _recommend_loop(model_dir, commodity, quantity_kg, farmer_district,
+                    farmer_state, target_month, target_year,
+                    max_distance_km, top_n):
+    """
+    The per-market loop recommend() replaced: every market in the
+    price history → get_distance → predict_price → the round()
+    profit arithmetic, one market at a time.
+    """
+    recommender._load_data()
+    origin = recommender._district_id(farmer_district, farmer_state)
+    history = read_history(model_dir,
+                           columns=['commodity', 'market', 'district',
+                                    'state'])
+    markets = history[history['commodity'] == commodity][
+        ['market', 'district', 'state']].drop_duplicates()
+    rows = []
+    for _, row in markets.iterrows():
+        dist = get_distance(farmer_district, row['district'],
+                            farmer_state, row['state'])
+        if dist > max_distance_km:
+            continue
+        price = predict_price(row['district'], commodity, row['state'],
+                              target_month, target_year, row['market'])
+        if price is None or price <= 0:
+            continue
+        rows.append({
+            'market': row['market'], 'district': row['district'],
+            'state': row['state'], 'distance_km': dist,
+            'is_same_district': (origin is not None and
+                                 recommender._district_id(
+                                     row['district'], row['state']) == origin),
+            'predicted_price': price,
+            **_profit_reference(quantity_kg, price, dist)})
+    rows.sort(key=lambda x: x['net_profit'], reverse=True)
+    return rows[:top_n]
+
+
+COLUMNAR_CASES = (
+    [(c, q, 'Coimbatore', 'Tamil Nadu', m, 2025, 300, 10)
+     for c in ['Tomato', 'Onion', 'Potato']
+     for q in [100, 250, 1500, 6000]
+     for m in [1, 6]] +
+    [('Tomato', 500, d, s, 6, 2025, radius, 10)
+     for d, s in [('Coimbatore', 'Tamil Nadu'), ('Nashik', 'Maharashtra'),
+                  ('Nowhere', 'Tamil Nadu')]
+     for radius in [60, 1000]])
+
+
+@pytest.mark.parametrize('case', COLUMNAR_CASES)
+def test_columnar_matches_per_market_loop(case, model_dir, no_caches):
+    expected = _recommend_loop(model_dir, *case)
+    recommender._candidates.clear()
+    assert recommend(*case) == expected
+
+
+@pytest.mark.parametrize('commodity', ['Tomato', 'Onion', 'Wheat'])
+@pytest.mark.parametrize('lat, lon', [(11.0, 76.96),     # Coimbatore
+                                      (20.0, 73.78),     # Nashik
+                                      (28.6, 77.2),      # Delhi
+                                      (8.0, 60.0)])      # open sea
+def test_grid_matches_brute_force(commodity, lat, lon, model_dir):
+    from geo import haversine
+
+    recommender._load_data()
+    t = recommender._market_table(commodity)
+    coords = recommender._coords
+    known = t.rows >= 0
+    brute_km = haversine(lat, lon, coords[t.rows[known], 0],
+                         coords[t.rows[known], 1])
+    for radius in [50, 150, 300, 1000, 5000]:
+        found = recommender.markets_within(lat, lon, radius, commodity)
+        keep = brute_km <= radius
+        assert found['market'].tolist() == t.market[known][keep].tolist()
+        assert found['distance_km'].tolist() == brute_km[keep].tolist()
+
+
+SWEEP_QUANTITIES = [100, 500, 1000, 1001, 2500, 5000, 5001, 8000, 20000]
+
+
+@pytest.mark.parametrize('args', [
+    ('Tomato', 'Coimbatore', 'Tamil Nadu', 6, 2025, 300, 3),
+    ('Onion', 'Nashik', 'Maharashtra', 1, 2025, 500, 5),
+    ('Rice', 'Nowhere', 'Kerala', 9, 2026, 200, 3),
+])
+def test_sweep_matches_recommend_per_quantity(args, no_caches):
+    commodity, *rest = args
+    one_by_one = {}
+    for q in SWEEP_QUANTITIES:
+        recommender._candidates.clear()
+        one_by_one[q] = recommend(commodity, q, *rest)
+    recommender._candidates.clear()
+    assert recommender.recommend_sweep(commodity, SWEEP_QUANTITIES,
+                                       *rest) == one_by_one
+
+
+@pytest.mark.parametrize('args', [
+    ('Onion', 'Nashik', 'Maharashtra', 3, 2025, 250, 5),
+    ('Tomato', 'Coimbatore', 'Tamil Nadu', 11, 2025, 150, 3),
+])
+def test_cached_candidates_match_fresh(args, no_caches):
+    commodity, *rest = args
+    quantities = [137, 480, 999.5, 1000, 3333, 5000.25, 12000]
+    fresh = []
+    for q in quantities:
+        recommender._candidates.clear()
+        fresh.append(recommend(commodity, q, *rest))
+
+    recommender._candidates.clear()
+    hits = recommender.candidate_cache_stats()['hits']
+    cached = [recommend(commodity, q, *rest) for q in quantities]
+    assert cached == fresh
+    assert (recommender.candidate_cache_stats()['hits'] - hits ==
+            len(quantities) - 1)
+
+
+def _search_cases(n=300):
+    """Random farmers, crops, quantities, radii and top_n."""
+    import numpy as np
+
+    recommender._load_data()
+    rng = np.random.default_rng(0)
+    origins = recommender._centroids[['District', 'State']].to_numpy()
+    return [(str(rng.choice(['Tomato', 'Onion', 'Potato', 'Wheat', 'Rice'])),
+             int(rng.choice([100, 250, 750, 1000, 2500, 6000, 15000])),
+             *origins[rng.integers(len(origins))],
+             int(rng.integers(1, 13)), 2025,
+             int(rng.choice([100, 200, 300, 500])),
+             int(rng.choice([1, 3, 5])))
+            for _ in range(n)]
+
+
+def test_branch_and_bound_matches_scoring_everything(no_caches):
+    cases = _search_cases()
+    before = recommender.search_stats()
+    pruned = [recommend(*case) for case in cases]
+    after = recommender.search_stats()
+
+    recommender._candidates.clear()
+    every = [recommender.recommend_sweep(c, [q], d, s, mo, y, km, n)[q]
+             for c, q, d, s, mo, y, km, n in cases]
+    bad = [case for case, p, e in zip(cases, pruned, every) if p != e]
+    assert not bad, f"{len(bad)} queries differ, e.g. {bad[0]}"
+    assert after['scored'] - before['scored'] < \
+        after['markets'] - before['markets']       # something was pruned
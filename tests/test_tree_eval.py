@@ -0,0 +1,126 @@
+"""tree_eval.TreeEnsemble against the XGBoost model it was exported from."""
+
+import os
+
+import numpy as np
+import pytest
+
+from tree_eval import TREES_FILE, export_trees, load_trees
+
+xgboost = pytest.importorskip('xgboost')
+
+
+def _features(rng, n, n_features=6):
+    """Rows with a few NaNs and values right on common thresholds."""
+    X = rng.normal(size=(n, n_features)).astype(np.float32)
+    X[rng.random(X.shape) < 0.1] = np.nan
+    X[:, 0] = np.round(X[:, 0], 1)
+    return X
+
+
+@pytest.fixture(scope='module')
+def synthetic(tmp_path_factory):
+    """A small XGBRegressor on synthetic data, exported and reloaded."""
+    rng = np.random.default_rng(0)
+    X = _features(rng, 2_000)
+    y = (1500 + 300 * np.nan_to_num(X[:, 0]) -
+         200 * np.nan_to_num(X[:, 1]) ** 2 + rng.normal(0, 50, len(X)))
+    model = xgboost.XGBRegressor(n_estimators=60, max_depth=5,
+                                 learning_rate=0.2, random_state=0)
+    model.fit(X, y)
+    path = tmp_path_factory.mktemp('trees') / TREES_FILE
+    export_trees(model, str(path))
+    return model, load_trees(str(path))
+
+
+def test_predict_is_bit_exact(synthetic):
+    model, trees = synthetic
+    X = _features(np.random.default_rng(1), 5_000)
+    assert np.array_equal(model.predict(X), trees.predict(X))
+
+
+def test_single_row_and_all_missing(synthetic):
+    model, trees = synthetic
+    X = np.full((3, 6), np.nan, dtype=np.float32)
+    X[1] = 0.0
+    for row in X:
+        assert np.array_equal(model.predict(row[None, :]),
+                              trees.predict(row[None, :]))
+
+
+def test_active_model_is_bit_exact(model_dir):
+    import joblib
+    import pandas as pd
+
+    path = os.path.join(model_dir, TREES_FILE)
+    if not os.path.exists(path):
+        pytest.skip(f"{TREES_FILE} not exported for this version")
+    model = joblib.load(os.path.join(model_dir, 'price_model.joblib'))
+    trees = load_trees(path)
+    df = pd.read_parquet(os.path.join(model_dir, 'clean_df.parquet'))
+    if not set(trees.feature_names) <= set(df.columns):
+        pytest.skip("clean_df.parquet has no training feature columns")
+    X = df[trees.feature_names].sample(min(len(df), 20_000),
+                                       random_state=0).astype(np.float32)
+    noise = X.sample(min(len(X), 2_000), random_state=1)
+    rng = np.random.default_rng(0)
+    noise = noise * rng.uniform(0.5, 1.5, noise.shape).astype(np.float32)
+    X = pd.concat([X, noise.mask(rng.random(noise.shape) < 0.1)])
+    assert np.array_equal(model.predict(X), trees.predict(X))
+
+
+def _open_boxes(X, rng):
+    """Boxes around X: some features fully open, some widened."""
+    lo, hi = X.astype(np.float64), X.astype(np.float64)
+    lo[:, 0], hi[:, 0] = -np.inf, np.inf
+    width = rng.uniform(0, 1, size=X.shape) * (rng.random(X.shape) < 0.3)
+    return lo - width, hi + width
+
+
+def _inside(lo, hi, rng, k):
+    """k random points of every box (NaN features stay NaN)."""
+    span = np.where(np.isinf(hi - lo), 10.0, hi - lo)
+    low = np.where(np.isinf(lo), -5.0, lo)
+    return [np.where(np.isnan(lo), np.nan,
+                     low + rng.random(lo.shape) * span).astype(np.float32)
+            for _ in range(k)]
+
+
+def test_upper_bound_is_sound(synthetic):
+    _, trees = synthetic
+    rng = np.random.default_rng(2)
+    X = _features(rng, 1_000)
+    lo, hi = _open_boxes(X, rng)
+    bound = trees.upper_bound(lo, hi)
+    for points in _inside(lo, hi, rng, 20):
+        assert (trees.predict(points) <= bound).all()
+
+
+def test_upper_bound_of_a_point_is_tight(synthetic):
+    _, trees = synthetic
+    X = _features(np.random.default_rng(3), 1_000)
+    bound = trees.upper_bound(X, X)
+    got = trees.predict(X).astype(np.float64)
+    assert (got <= bound).all()
+    # only the float32 rounding slack is left, not a price-sized margin
+    assert (bound - got).max() < 1e-3 * np.abs(got).max()
+
+
+def test_upper_bound_year_open_on_active_model(model_dir):
+    import pandas as pd
+
+    path = os.path.join(model_dir, TREES_FILE)
+    if not os.path.exists(path):
+        pytest.skip(f"{TREES_FILE} not exported for this version")
+    trees = load_trees(path)
+    df = pd.read_parquet(os.path.join(model_dir, 'clean_df.parquet'))
+    if 'year' not in trees.feature_names or \
+            not set(trees.feature_names) <= set(df.columns):
+        pytest.skip("model has no year feature / no feature columns")
+    sample = df[trees.feature_names].sample(
+        min(len(df), 2_000), random_state=0).astype(np.float64)
+    lo, hi = sample.copy(), sample.copy()
+    lo['year'], hi['year'] = -np.inf, np.inf
+    bound = trees.upper_bound(lo, hi)
+    for year in (2000, 2015, 2020, 2024, 2030):
+        assert (trees.predict(sample.assign(year=year)) <= bound).all()
@@ -3,10 +3,10 @@ train_model.py
 ==============
 Trains XGBoost model on Agriculture_price_dataset.csv
 Run this ONCE before anything else.
-Saves model artifacts to model/ folder.
+Saves model artifacts to a new version under model/versions/
+and points model/current at it (see artifacts.py).
 """
 
-import os
 import pandas as pd
 import numpy as np
 from xgboost import XGBRegressor
@@ -14,12 +14,16 @@ from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import mean_absolute_error, r2_score
 import joblib
 import warnings
+from history import (MARKETS_FILE, SNAPSHOT_VERSION, build_markets,
+                     build_snapshot)
+from ingest import clean_prices
+from tree_eval import TREES_FILE, export_trees
+from districts import CROSSWALK_FILE, write_crosswalk
+from artifacts import new_version, write_manifest, set_current
 warnings.filterwarnings('ignore')
 
 # ── Paths ────────────────────────────────────────────────
 DATA_PATH  = 'datasets/Agriculture_price_dataset.csv'
-MODEL_DIR  = 'model'
-os.makedirs(MODEL_DIR, exist_ok=True)
 
 # ─────────────────────────────────────────────────────────
 # STEP 1: LOAD & CLEAN
@@ -28,53 +32,9 @@ print("📂 Loading dataset...")
 df = pd.read_csv(DATA_PATH)
 print(f"   Raw shape: {df.shape}")
 
-# Standardize column names
-df = df.rename(columns={
-    'STATE':          'state',
-    'District Name':  'district',
-    'Market Name':    'market',
-    'Commodity':      'commodity',
-    'Min_Price':      'min_price',
-    'Max_Price':      'max_price',
-    'Modal_Price':    'modal_price',
-    'Price Date':     'price_date'
-})
-
-# Fix state name inconsistencies
-state_fix = {
-    'tamilnadu':          'Tamil Nadu',
-    'tamil nadu':         'Tamil Nadu',
-    'jammu & kashmir':    'Jammu and Kashmir',
-    'jammu and kashmir':  'Jammu and Kashmir',
-    'chattisgarh':        'Chhattisgarh',
-    'chhattisgarh':       'Chhattisgarh',
-    'uttrakhand':         'Uttarakhand',
-    'orissa':             'Odisha',
-    'gao':                'Goa',
-}
-df['state'] = df['state'].str.strip()
-df['state'] = df['state'].str.strip().str.lower()\
-    .map(lambda x: state_fix.get(x, x.title()))
-
-# Clean strings
-df['district']  = df['district'].str.strip().str.title()
-df['market']    = df['market'].str.strip()
-df['commodity'] = df['commodity'].str.strip()
-
-# Parse dates and prices
-df['price_date']  = pd.to_datetime(df['price_date'],
-                                    dayfirst=False,
-                                    errors='coerce')
-df['modal_price'] = pd.to_numeric(df['modal_price'],
-                                   errors='coerce')
-df['min_price']   = pd.to_numeric(df['min_price'],
-                                   errors='coerce')
-df['max_price']   = pd.to_numeric(df['max_price'],
-                                   errors='coerce')
-
-# Drop bad rows
-df = df.dropna(subset=['price_date', 'modal_price'])
-df = df[df['modal_price'] > 0]
+# Standardize names, parse dates / prices, drop bad rows
+# (shared with ingest.py so new batches are cleaned the same way)
+df = clean_prices(df)
 
 # Sort for lag features
 df = df.sort_values(['commodity', 'market', 'price_date'])\
@@ -229,7 +189,7 @@ mape  = np.mean(
             test['modal_price'])
 ) * 100
 
-print(f"\n📊 Model Performance:")
+print("\n📊 Model Performance:")
 print(f"   MAE:  ₹{mae:.2f} per quintal")
 print(f"   MAPE: {mape:.1f}%")
 print(f"   R²:   {r2:.3f}")
@@ -239,24 +199,54 @@ feat_imp = pd.Series(
     model.feature_importances_,
     index=FEATURES
 ).sort_values(ascending=False)
-print(f"\n🔝 Top 5 Features:")
+print("\n🔝 Top 5 Features:")
 for feat, imp in feat_imp.head(5).items():
     print(f"   {feat}: {imp:.4f}")
 
 # ─────────────────────────────────────────────────────────
 # STEP 6: SAVE EVERYTHING
 # ─────────────────────────────────────────────────────────
+VERSION, MODEL_DIR = new_version()
 print(f"\n💾 Saving artifacts to {MODEL_DIR}/...")
 
 joblib.dump(model,    f'{MODEL_DIR}/price_model.joblib')
+print("   ✅ price_model.joblib")
 joblib.dump(encoders, f'{MODEL_DIR}/encoders.joblib')
+print("   ✅ encoders.joblib")
 joblib.dump(FEATURES, f'{MODEL_DIR}/features.joblib')
+print("   ✅ features.joblib")
+
+# Flat tree arrays — predict.py evaluates these with NumPy
+export_trees(model, f'{MODEL_DIR}/{TREES_FILE}')
+print(f"   ✅ {TREES_FILE}")
 
 # Save clean dataframe (needed for lag lookup in predict.py)
 df.to_parquet(f'{MODEL_DIR}/clean_df.parquet', index=False)
-
-print(f"   ✅ price_model.joblib")
-print(f"   ✅ encoders.joblib")
-print(f"   ✅ features.joblib")
-print(f"   ✅ clean_df.parquet")
-print(f"\n✅ Training complete! Run predict.py to test.")
+print("   ✅ clean_df.parquet")
+
+# Serving snapshot — lag/rolling features per series, so predict.py
+# does not need the full history table in memory
+snapshot = build_snapshot(df)
+snapshot.to_parquet(f'{MODEL_DIR}/serving_snapshot.parquet', index=False)
+print(f"   ✅ serving_snapshot.parquet ({len(snapshot):,} series)")
+
+# Distinct markets per commodity — lists markets without the history
+markets = build_markets(df)
+markets.to_parquet(f'{MODEL_DIR}/{MARKETS_FILE}', index=False)
+print(f"   ✅ {MARKETS_FILE} ({len(markets):,} rows)")
+
+# District id of every spelling — names left without a centroid
+# (no distance, ever) are reported here, not per request
+write_crosswalk(MODEL_DIR, markets)
+print(f"   ✅ {CROSSWALK_FILE}")
+
+# Manifest (hashes, training date, features), then switch `current`
+write_manifest(MODEL_DIR, VERSION, FEATURES,
+               metrics={'mae': round(float(mae), 2),
+                        'mape': round(float(mape), 2),
+                        'r2': round(float(r2), 4)},
+               snapshot_version=SNAPSHOT_VERSION)
+print("   ✅ manifest.json")
+set_current(VERSION)
+print(f"   ✅ model/current → {VERSION}")
+print("\n✅ Training complete! Run predict.py to test.")
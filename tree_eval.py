@@ -0,0 +1,283 @@
+"""
+tree_eval.py
+============
+Pure-NumPy evaluator for the trained XGBoost price model.
+Used by predict.py (serving) and train_model.py (export).
+
+export_trees() flattens the booster into padded arrays — one
+row per tree, one column per node — saved as price_trees.npz
+next to price_model.joblib. TreeEnsemble walks every tree for a
+whole batch at once (one gather per depth level), so small
+batches need neither xgboost nor the pickled XGBRegressor. Its
+cost grows with rows x trees x depth, and from a few hundred
+rows the compiled booster is faster: predict.py hands batches of
+BOOSTER_MIN_ROWS or more to the booster, loaded on first use.
+
+Split rule, as in XGBoost: go left when x < threshold (both
+float32), follow default_left when x is NaN. Leaf values are
+summed onto base_score in tree order in float32, which gives
+the same floats as XGBRegressor.predict.
+
+upper_bound() walks the same trees with a [lo, hi] range per
+feature instead of a value, keeping every branch the range
+reaches — the largest prediction any row in the box can get.
+
+Usage:
+    from tree_eval import load_trees
+    model = load_trees('model/versions/<id>/price_trees.npz')
+    prices = model.predict(X)     # DataFrame or 2-D array
+    ceiling = model.upper_bound(X_lo, X_hi)
+
+    python tree_eval.py [version]   # export if missing, then
+                                    # benchmark (parity: tests/)
+"""
+
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+TREES_FILE = 'price_trees.npz'
+
+
+def export_trees(model, path):
+    """
+    Flatten an XGBRegressor (or Booster) into padded node arrays
+    and save them to `path` (.npz). Returns the arrays.
+
+    Per tree t and node n:
+      feature[t, n]      split column, -1 at leaves
+      threshold[t, n]    split value (float32)
+      left / right[t, n] child node ids; a leaf points at itself
+      default_left[t, n] direction for missing values
+      value[t, n]        leaf value (float32), 0 on split nodes
+    """
+    booster = model.get_booster() if hasattr(model, 'get_booster') else model
+    learner = json.loads(booster.save_raw('json'))['learner']
+    trees   = learner['gradient_booster']['model']['trees']
+
+    n_trees   = len(trees)
+    max_nodes = max(len(t['left_children']) for t in trees)
+    feature      = np.full((n_trees, max_nodes), -1, dtype=np.int32)
+    threshold    = np.zeros((n_trees, max_nodes), dtype=np.float32)
+    left         = np.zeros((n_trees, max_nodes), dtype=np.int32)
+    right        = np.zeros((n_trees, max_nodes), dtype=np.int32)
+    default_left = np.zeros((n_trees, max_nodes), dtype=bool)
+    value        = np.zeros((n_trees, max_nodes), dtype=np.float32)
+    depth = 0
+
+    for t, tree in enumerate(trees):
+        lc    = np.asarray(tree['left_children'], dtype=np.int32)
+        rc    = np.asarray(tree['right_children'], dtype=np.int32)
+        cond  = np.asarray(tree['split_conditions'], dtype=np.float32)
+        n     = len(lc)
+        nodes = np.arange(n, dtype=np.int32)
+        leaf  = lc == -1
+
+        feature[t, :n]      = np.where(leaf, -1, tree['split_indices'])
+        threshold[t, :n]    = np.where(leaf, 0, cond)
+        left[t, :n]         = np.where(leaf, nodes, lc)
+        right[t, :n]        = np.where(leaf, nodes, rc)
+        default_left[t, :n] = np.asarray(tree['default_left'], dtype=bool)
+        value[t, :n]        = np.where(leaf, cond, 0)
+
+        # Depth of the deepest leaf (parents come before children)
+        node_depth = np.zeros(n, dtype=np.int32)
+        for i in range(n):
+            if not leaf[i]:
+                node_depth[lc[i]] = node_depth[rc[i]] = node_depth[i] + 1
+        depth = max(depth, int(node_depth.max()))
+
+    base_score = float(learner['learner_model_param']['base_score']
+                       .strip('[]'))
+    arrays = dict(
+        feature=feature, threshold=threshold, left=left, right=right,
+        default_left=default_left, value=value,
+        base_score=np.float32(base_score), depth=np.int32(depth),
+        feature_names=np.array(learner.get('feature_names') or [], dtype=str),
+    )
+    np.savez(path, **arrays)
+    return arrays
+
+
+class TreeEnsemble:
+    """Vectorized evaluator over the arrays written by export_trees()."""
+
+    def __init__(self, arrays):
+        self.base_score    = np.float32(arrays['base_score'])
+        self.depth         = int(arrays['depth'])
+        self.feature_names = [str(f) for f in arrays['feature_names']]
+        self.n_trees       = arrays['feature'].shape[0]
+
+        # Re-lay every tree as a complete binary tree of `depth`
+        # levels: at level L, tree t's nodes sit at t * 2**L + pos and
+        # the children of pos are 2*pos and 2*pos + 1. A leaf above
+        # the last level is copied into both children, so routing
+        # through it changes nothing — and the walk needs no
+        # left / right lookups, just arithmetic.
+        trees = np.arange(self.n_trees)[:, None]
+        local = np.zeros((self.n_trees, 1), dtype=np.int32)
+        self.levels = []
+        for _ in range(self.depth):
+            feature = arrays['feature'][trees, local]
+            leaf    = feature < 0
+            self.levels.append((
+                np.maximum(feature, 0).ravel(),
+                arrays['threshold'][trees, local].ravel(),
+                arrays['default_left'][trees, local].ravel(),
+            ))
+            left  = np.where(leaf, local, arrays['left'][trees, local])
+            right = np.where(leaf, local, arrays['right'][trees, local])
+            local = np.stack([left, right], axis=2)\
+                      .reshape(self.n_trees, -1)
+        self.value = arrays['value'][trees, local].ravel()
+
+    def leaf_values(self, X):
+        """(n_trees, n_rows) float32 leaf value each row lands on."""
+        X = np.asarray(getattr(X, 'values', X), dtype=np.float32)
+        n = X.shape[0]
+        cols = X.T.ravel()                 # feature-major: f * n + row
+        row  = np.arange(n, dtype=np.int32)
+        has_nan = bool(np.isnan(cols).any())
+        # node = t * 2**L + pos, starting at each tree's root
+        node = np.repeat(np.arange(self.n_trees, dtype=np.int32)[:, None],
+                         n, axis=1)
+        for feature, threshold, default_left in self.levels:
+            x = cols.take(feature.take(node) * n + row)
+            go_right = x >= threshold.take(node)
+            if has_nan:
+                go_right = np.where(np.isnan(x),
+                                    ~default_left.take(node), go_right)
+            node = 2 * node + go_right
+        return self.value.take(node)
+
+    def predict(self, X):
+        """Predicted prices for a batch, float32 like XGBRegressor."""
+        leaves = self.leaf_values(X)
+        out = np.full(leaves.shape[1], self.base_score, dtype=np.float32)
+        for leaf in leaves:                # tree order, as XGBoost sums
+            out += leaf
+        return out
+
+    def upper_bound(self, lo, hi, chunk=64):
+        """
+        Upper bound on predict() over every row whose features lie
+        in [lo, hi] (2-D, same columns as X). A feature with
+        lo == hi is routed exactly, NaN as missing; a wider range
+        follows both branches wherever a split falls inside it.
+        Each tree adds its largest reachable leaf.
+
+        predict() sums in float32, and each addition may round up
+        by half an ulp of the partial sum — so the bound adds eps
+        times every partial sum's largest possible magnitude, per
+        row, from the reachable leaves' range.
+        """
+        lo = np.asarray(getattr(lo, 'values', lo), dtype=np.float32)
+        hi = np.asarray(getattr(hi, 'values', hi), dtype=np.float32)
+        base = float(self.base_score)
+        eps  = float(np.finfo(np.float32).eps)
+        out = np.empty(lo.shape[0], dtype=np.float64)
+        for start in range(0, lo.shape[0], chunk):
+            rows = slice(start, start + chunk)
+            low, high = self._tree_range(lo[rows], hi[rows])
+            top    = base + np.cumsum(high, axis=0)   # partial sums' range
+            bottom = base + np.cumsum(low, axis=0)
+            slack  = eps * np.maximum(np.abs(top), np.abs(bottom)).sum(axis=0)
+            out[rows] = top[-1] + slack
+        return out
+
+    def _tree_range(self, lo, hi):
+        """
+        (smallest, largest) leaf value reachable per tree — two
+        (n_trees, n_rows) float64 arrays.
+        """
+        n = lo.shape[0]
+        reach = np.ones((self.n_trees, n), dtype=bool)
+        for feature, threshold, default_left in self.levels:
+            x_lo = lo[:, feature].T                 # (nodes, rows)
+            x_hi = hi[:, feature].T
+            thr  = threshold[:, None]
+            left  = (x_lo < thr) | (np.isnan(x_lo) & default_left[:, None])
+            right = (x_hi >= thr) | (np.isnan(x_hi) & ~default_left[:, None])
+            nxt = np.empty((2 * reach.shape[0], n), dtype=bool)
+            nxt[0::2] = reach & left
+            nxt[1::2] = reach & right
+            reach = nxt
+        value = self.value[:, None]
+        shape = (self.n_trees, -1, n)
+        low  = np.where(reach, value, np.inf).reshape(shape).min(axis=1)
+        high = np.where(reach, value, -np.inf).reshape(shape).max(axis=1)
+        return low.astype(np.float64), high.astype(np.float64)
+
+
+def load_trees(path):
+    """TreeEnsemble from a price_trees.npz file."""
+    with np.load(path) as f:
+        return TreeEnsemble({k: f[k] for k in f.files})
+
+
+# ── Quick test: parity + benchmark ───────────────────────
+if __name__ == '__main__':
+    import subprocess
+
+    import joblib
+    import pandas as pd
+
+    from artifacts import resolve
+
+    version, model_dir = resolve(sys.argv[1] if len(sys.argv) > 1 else None)
+    trees_path = os.path.join(model_dir, TREES_FILE)
+    model = joblib.load(f'{model_dir}/price_model.joblib')
+    if not os.path.exists(trees_path):
+        export_trees(model, trees_path)
+        print(f"💾 Exported {trees_path}")
+    trees = load_trees(trees_path)
+    features = trees.feature_names
+    print(f"🌳 {version}: {trees.n_trees} trees, depth {trees.depth}, "
+          f"{len(features)} features")
+
+    # Real feature rows (incl. NaN lags) and perturbed ones
+    df = pd.read_parquet(f'{model_dir}/clean_df.parquet')
+    real = df[[c for c in features if c in df.columns]]
+    if list(real.columns) == features:
+        rows = real.sample(min(len(real), 20_000), random_state=0)
+    else:
+        rows = pd.DataFrame(np.zeros((0, len(features))), columns=features)
+    rows = rows.astype(np.float32)
+    rng = np.random.default_rng(0)
+    noise = rows.sample(min(len(rows), 2_000), random_state=1)
+    noise = noise * rng.uniform(0.5, 1.5, noise.shape).astype(np.float32)
+    noise = noise.mask(rng.random(noise.shape) < 0.1)
+    X = pd.concat([rows, noise], ignore_index=True)
+
+    # Latency per batch size
+    def _best(fn, repeat):
+        best = float('inf')
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - t0)
+        return best * 1000
+
+    print(f"\n⏱  {'rows':>6} {'xgboost':>10} {'numpy':>10}")
+    for n in (1, 10, 100, 200, 1000, 5000):
+        batch = X.iloc[:n]
+        xgb_ms = _best(lambda: model.predict(batch), 20)
+        np_ms  = _best(lambda: trees.predict(batch), 20)
+        print(f"   {n:>6} {xgb_ms:>8.2f}ms {np_ms:>8.2f}ms "
+              f"({xgb_ms / np_ms:,.1f}x)")
+
+    # Cold import + load, each in a fresh interpreter
+    def _cold(code):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], check=True)
+        return time.perf_counter() - t0
+
+    xgb_s = _cold(f"import joblib; joblib.load({model_dir!r} + "
+                  f"'/price_model.joblib')")
+    np_s  = _cold(f"from tree_eval import load_trees; "
+                  f"load_trees({trees_path!r})")
+    print(f"\n📦 Import + load: xgboost {xgb_s:.2f}s, "
+          f"numpy {np_s:.2f}s ({xgb_s / np_s:,.1f}x)")